@@ -0,0 +1,217 @@
+"""Benchmarks for the filtering and drawing hot paths on the bundled ECG recordings.
+
+    python benchmarks.py                      # everything, on 1M samples
+    python benchmarks.py --samples 4000000 streaming families
+    python benchmarks.py --json results.json  # keep results to compare later
+
+data/normal_ecg.csv and data/abnormal_ecg.csv are tiled to the requested
+length. Each case times a sequence of calls and reports throughput in
+samples per second with the p50 and p99 latency of a single call, so a
+regression in one stage shows up without running the GUI. Plot frames are
+drawn on an off-screen Agg canvas.
+"""
+import argparse
+import json
+import sys
+import time
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from scipy.signal import freqz, lfilter, sosfilt, zpk2sos, zpk2tf
+
+from filter_designs import PREDEFINED_FILTERS, design_predefined_filter
+from filter_engine import BACKENDS, FilterEngine
+from frequency_response import ResponseEvaluator
+from rendering import BlitLinePlot
+from signal_io import read_csv_signal
+
+ECG_FILES = ["data/normal_ecg.csv", "data/abnormal_ecg.csv"]
+REFERENCE_DESIGN = ("Butterworth LPF", 4, 0.2)
+
+
+def load_ecg(n_samples):
+    """Both bundled recordings back to back, tiled to n_samples, with a matching time axis."""
+    times, values = zip(*(read_csv_signal(path) for path in ECG_FILES))
+    signal = np.concatenate(values)
+    signal = np.tile(signal, -(-n_samples // len(signal)))[:n_samples]
+    sample_rate = 1.0 / np.median(np.diff(times[0]))
+    return np.arange(n_samples) / sample_rate, signal
+
+
+def measure(call, calls, samples_per_call=1, min_time=0.2):
+    """Time call(i) for i in range(calls), repeating the run until min_time has passed.
+
+    Returns samples/s over all calls and the p50/p99 latency of one call in microseconds.
+    """
+    durations = []
+    started = time.perf_counter()
+    while not durations or time.perf_counter() - started < min_time:
+        for i in range(calls):
+            start = time.perf_counter()
+            call(i)
+            durations.append(time.perf_counter() - start)
+    durations = np.array(durations)
+    return {
+        "samples_per_s": samples_per_call * len(durations) / durations.sum(),
+        "p50_us": 1e6 * np.percentile(durations, 50),
+        "p99_us": 1e6 * np.percentile(durations, 99),
+    }
+
+
+def block_calls(engine, signal, block_size):
+    """A call per block of the signal, restarting the stream at the first block."""
+    n_blocks = len(signal) // block_size
+
+    def call(i):
+        if i == 0:
+            engine.reset()
+        engine.process(signal[i * block_size:(i + 1) * block_size])
+    return call, n_blocks
+
+
+def bench_streaming(signal):
+    """FilterEngine.process one sample per call, as the GUI did, against growing blocks."""
+    engine = FilterEngine(*design_predefined_filter(*REFERENCE_DESIGN))
+    per_sample = signal[:20000]
+    results = {"per-sample": measure(lambda i: engine.process(per_sample[i:i + 1]), len(per_sample))}
+    for block_size in [100, 1000, 65536]:
+        call, calls = block_calls(engine, signal, block_size)
+        results[f"block {block_size}"] = measure(call, calls, block_size)
+    return results
+
+
+def bench_kernels(signal):
+    """Every backend in float64 and float32, streaming into a preallocated output.
+
+    Backends whose compiler is missing fall back to SciPy and are skipped.
+    """
+    design = design_predefined_filter("Elliptic BPF", 8, 0.2)
+    results = {}
+    for dtype in [np.float64, np.float32]:
+        samples = signal.astype(dtype)
+        out = np.empty_like(samples)
+        for backend in BACKENDS:
+            engine = FilterEngine(*design, dtype=dtype, backend=backend)
+            if backend != "scipy" and engine.kernel is None:
+                continue
+            for block_size in [10, 1000, 65536]:
+                n_blocks = min(len(samples) // block_size, 10000)
+
+                def call(i):
+                    if i == 0:
+                        engine.reset()
+                    block = slice(i * block_size, (i + 1) * block_size)
+                    engine.process(samples[block], out=out[block])
+                results[f"{backend} {np.dtype(dtype).name} block {block_size}"] = measure(call, n_blocks, block_size)
+    return results
+
+
+def bench_tf_vs_sos(signal):
+    """Whole-signal lfilter on the expanded transfer function against sosfilt on the sections."""
+    results = {}
+    for order in [2, 4, 8]:
+        zeros, poles, gain = design_predefined_filter("Elliptic LPF", order, 0.2)
+        b, a = zpk2tf(zeros, poles, gain)
+        sos = zpk2sos(zeros, poles, gain)
+        results[f"order {order} tf"] = measure(lambda i: lfilter(b, a, signal), 1, len(signal))
+        results[f"order {order} sos"] = measure(lambda i: sosfilt(sos, signal), 1, len(signal))
+    return results
+
+
+def bench_families(signal):
+    """Every filter library entry at orders 2 to 8, streamed in blocks of 65536."""
+    results = {}
+    for name in PREDEFINED_FILTERS:
+        for order in [2, 4, 6, 8]:
+            engine = FilterEngine(*design_predefined_filter(name, order, 0.2))
+            call, calls = block_calls(engine, signal, 65536)
+            results[f"{name} order {order}"] = measure(call, calls, 65536)
+    return results
+
+
+def bench_frequency_response(signal):
+    """Frequency response on the 8000-point plot grid: freqz, a full evaluation, and one dragged root.
+
+    Samples here are grid frequencies, 8000 per evaluation.
+    """
+    zeros, poles, gain = design_predefined_filter("Elliptic BPF", 8, 0.2)
+    b, a = zpk2tf(zeros, poles, gain)
+    evaluator = ResponseEvaluator()
+    n_points = len(evaluator.w)
+    results = {"freqz": measure(lambda i: freqz(b, a, worN=n_points), 50, n_points)}
+
+    def full_evaluation(i):
+        evaluator.set_design([], [])
+        evaluator.set_design(zeros, poles)
+        evaluator.magnitude_db, evaluator.phase
+    results["full evaluation"] = measure(full_evaluation, 50, n_points)
+
+    evaluator.set_design(zeros, poles)
+    steps = zeros[0] * (1 + 0.01 * np.exp(2j * np.pi * np.arange(200) / 200))
+
+    def drag_step(i):
+        evaluator.move_zero(0, steps[i])
+        evaluator.magnitude_db, evaluator.phase
+    results["drag step"] = measure(drag_step, len(steps), n_points)
+    return results
+
+
+def bench_plot_frames(signal, x_values):
+    """update_plots frame cost: one BlitLinePlot.update per display frame as the signal grows."""
+    results = {}
+    step = 5000  # Samples processed between frames
+    n_frames = len(signal) // step
+    for decimation in ["minmax", "lttb", None]:
+        figure = Figure(figsize=(10, 4), dpi=100)
+        canvas = FigureCanvasAgg(figure)
+        renderer = BlitLinePlot(canvas, figure.add_subplot(111), decimation=decimation)
+        renderer.reset("Benchmark", "blue")
+
+        def frame(i):
+            end = (i + 1) * step
+            renderer.update(x_values[:end], signal[:end])
+        results[f"decimation {decimation}"] = measure(frame, n_frames, step)
+    return results
+
+
+BENCHMARKS = {
+    "streaming": bench_streaming,
+    "kernels": bench_kernels,
+    "tf-vs-sos": bench_tf_vs_sos,
+    "families": bench_families,
+    "frequency-response": bench_frequency_response,
+    "plot-frames": bench_plot_frames,
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("names", nargs="*", metavar="NAME",
+                        help="benchmarks to run (default: all): " + ", ".join(BENCHMARKS))
+    parser.add_argument("--samples", type=int, default=1 << 20, help="tiled signal length (default: 1048576)")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark: {', '.join(unknown)}")
+
+    x_values, signal = load_ecg(args.samples)
+    results = {}
+    for name in args.names or BENCHMARKS:
+        function = BENCHMARKS[name]
+        arguments = (signal, x_values) if name == "plot-frames" else (signal,)
+        results[name] = function(*arguments)
+        print(f"\n{name}")
+        for case, result in results[name].items():
+            print(f"  {case:<32} {result['samples_per_s']:>14,.0f} samples/s"
+                  f"  p50 {result['p50_us']:>10.1f} us  p99 {result['p99_us']:>10.1f} us")
+
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump({"samples": args.samples, "results": results}, file, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,321 @@
+"""C code generation for the designed filter.
+
+Three forms are generated:
+
+    Direct Form II      the single zpk2tf polynomial pair with a circular
+                        state buffer; compact, but the polynomial loses
+                        precision and stability as the order grows.
+    Biquad cascade      the zpk2sos second-order sections as transposed
+                        Direct Form II biquads, one unrolled block of code
+                        per section, with no modulo indexing. Runs in float
+                        or double and processes whole blocks at a time.
+    Fixed point         the same sections quantized to Q15 or Q31 by
+                        fixed_point.FixedPointDesign, as integer-only Direct
+                        Form I biquads with a 64-bit accumulator and
+                        saturation, for cores without an FPU.
+
+C_CODE_FORMS maps the names offered in the GUI to their generator, each
+called as generator(zeros, poles, gain) and returning the C source.
+"""
+import numpy as np
+from scipy.signal import zpk2sos, zpk2tf
+
+from fixed_point import FixedPointDesign
+
+SAMPLE_TYPES = ["float", "double"]
+
+
+def c_literal(value, sample_type="double"):
+    """Coefficient as a C literal of sample_type, with every significant digit kept."""
+    if sample_type == "float":
+        return f"{value:.9e}f"
+    return f"{value:.17e}"
+
+
+def direct_form_ii_code(zeros, poles, gain=1):
+    """Direct Form II over the full transfer function, one sample per call."""
+    b, a = (np.atleast_1d(c) for c in zpk2tf(zeros, poles, gain))
+    order = max(len(b), len(a)) - 1
+    # Both loops read their coefficients up to FILTER_ORDER, so pad the shorter polynomial with zeros
+    b = np.pad(b, (0, order + 1 - len(b)))
+    a = np.pad(a, (0, order + 1 - len(a)))
+    return f"""
+    /**
+     * Auto-generated digital filter implementation
+     * Filter Type: Direct Form II
+     * Number of zeros: {len(zeros)}
+     * Number of poles: {len(poles)}
+     */
+
+    #include <stdio.h>
+    #include <string.h>
+
+    #define FILTER_ORDER {order}
+    #define BUFFER_SIZE (FILTER_ORDER + 1)
+
+    // Filter coefficients
+    static const double b_coeffs[] = {{{', '.join(map(str, b))}}};
+    static const double a_coeffs[] = {{{', '.join(map(str, a))}}};
+
+    // State buffer for Direct Form II implementation
+    static double state[BUFFER_SIZE] = {{0.0}};
+    static int buffer_index = 0;
+
+    // Function to reset filter state
+    void reset_filter(void) {{
+        memset(state, 0, sizeof(state));
+        buffer_index = 0;
+    }}
+
+    // Process single sample through filter
+    double process_sample(double input) {{
+        double output = 0.0;
+        double new_state;
+
+        // Calculate new state
+        new_state = input;
+        for (int i = 1; i <= FILTER_ORDER; i++) {{
+            new_state -= a_coeffs[i] * state[(buffer_index - i + BUFFER_SIZE) % BUFFER_SIZE];
+        }}
+
+        // Update state buffer
+        state[buffer_index] = new_state;
+
+        // Calculate output
+        for (int i = 0; i <= FILTER_ORDER; i++) {{
+            output += b_coeffs[i] * state[(buffer_index - i + BUFFER_SIZE) % BUFFER_SIZE];
+        }}
+
+        // Update buffer index
+        buffer_index = (buffer_index + 1) % BUFFER_SIZE;
+
+        return output;
+    }}
+
+    // Example usage
+    #ifdef FILTER_TEST
+    int main() {{
+        // Test input samples
+        double test_samples[] = {{1.0, 0.0, 0.0, 0.0, 0.0}};
+        int num_samples = sizeof(test_samples) / sizeof(test_samples[0]);
+
+        printf("Testing filter implementation\\n");
+        printf("Input -> Output\\n");
+
+        for (int i = 0; i < num_samples; i++) {{
+            double output = process_sample(test_samples[i]);
+            printf("%f -> %f\\n", test_samples[i], output);
+        }}
+
+        return 0;
+    }}
+    #endif
+    """
+
+
+def biquad_cascade_code(zeros, poles, gain=1, sample_type="float"):
+    """Cascade of transposed Direct Form II biquads from zpk2sos, with block processing.
+
+    Each section computes
+        y  = b0 x + s1
+        s1 = b1 x - a1 y + s2
+        s2 = b2 x - a2 y
+    with its two state variables held in locals for the whole block. The
+    state lives in a caller-owned filter_state_t, so several independent
+    streams can share the code. Input and output may be the same buffer.
+    """
+    description = f"Number of zeros: {len(zeros)}\n * Number of poles: {len(poles)}"
+    return sos_cascade_code(zpk2sos(zeros, poles, gain), sample_type, description)
+
+
+def sos_cascade_code(sos, sample_type="float", description=""):
+    """biquad_cascade_code for ready-made sections, with description lines for the header comment."""
+    if sample_type not in SAMPLE_TYPES:
+        raise ValueError(f"Unsupported sample type: {sample_type}")
+    n_sections = len(sos)
+    description = f" * {description}\n" if description else ""
+
+    def literal(value):
+        return c_literal(value, sample_type)
+
+    load_state = "\n".join(
+        f"    filter_sample_t s{k}_1 = state->s[{k}][0], s{k}_2 = state->s[{k}][1];" for k in range(n_sections))
+    store_state = "\n".join(
+        f"    state->s[{k}][0] = s{k}_1;\n    state->s[{k}][1] = s{k}_2;" for k in range(n_sections))
+    sections = "\n".join(f"""
+        /* Section {k} */
+        y = {literal(b0)} * x + s{k}_1;
+        s{k}_1 = {literal(b1)} * x - {literal(a1)} * y + s{k}_2;
+        s{k}_2 = {literal(b2)} * x - {literal(a2)} * y;
+        x = y;""" for k, (b0, b1, b2, _, a1, a2) in enumerate(sos))
+
+    return f"""/**
+ * Auto-generated digital filter implementation
+ * Filter Type: Cascade of {n_sections} transposed Direct Form II biquads
+{description} * Sample type: {sample_type}
+ */
+
+#include <stddef.h>
+#include <stdio.h>
+#include <string.h>
+
+typedef {sample_type} filter_sample_t;
+
+#define FILTER_NUM_SECTIONS {n_sections}
+
+/* Two state variables per section, as in scipy.signal.sosfilt's zi */
+typedef struct {{
+    filter_sample_t s[FILTER_NUM_SECTIONS][2];
+}} filter_state_t;
+
+void filter_reset(filter_state_t *state) {{
+    memset(state, 0, sizeof(*state));
+}}
+
+/* Filter n samples from input into output; input and output may be the same buffer */
+void filter_process_block(filter_state_t *state, const filter_sample_t *input, filter_sample_t *output, size_t n) {{
+{load_state}
+    for (size_t i = 0; i < n; i++) {{
+        filter_sample_t x = input[i];
+        filter_sample_t y;
+{sections}
+        output[i] = x;
+    }}
+{store_state}
+}}
+
+filter_sample_t filter_process_sample(filter_state_t *state, filter_sample_t input) {{
+    filter_sample_t output;
+    filter_process_block(state, &input, &output, 1);
+    return output;
+}}
+
+#ifdef FILTER_TEST
+int main(void) {{
+    filter_state_t state;
+    filter_sample_t samples[] = {{1, 0, 0, 0, 0}};
+    size_t num_samples = sizeof(samples) / sizeof(samples[0]);
+
+    filter_reset(&state);
+    filter_process_block(&state, samples, samples, num_samples);
+    printf("Impulse response\\n");
+    for (size_t i = 0; i < num_samples; i++) {{
+        printf("%f\\n", (double)samples[i]);
+    }}
+    return 0;
+}}
+#endif
+"""
+
+
+def fixed_point_code(zeros, poles, gain=1, fmt="Q15"):
+    """Integer-only Q15/Q31 biquad cascade with per-section shifts and saturation."""
+    design = FixedPointDesign(zeros, poles, gain, fmt)
+    sample_type = "int16_t" if fmt == "Q15" else "int32_t"
+    n_sections = len(design.coefficients)
+
+    load_state = "\n".join(
+        f"    filter_sample_t x{k}_1 = state->x[{k}][0], x{k}_2 = state->x[{k}][1];\n"
+        f"    filter_sample_t y{k}_1 = state->y[{k}][0], y{k}_2 = state->y[{k}][1];" for k in range(n_sections))
+    store_state = "\n".join(
+        f"    state->x[{k}][0] = x{k}_1;\n    state->x[{k}][1] = x{k}_2;\n"
+        f"    state->y[{k}][0] = y{k}_1;\n    state->y[{k}][1] = y{k}_2;" for k in range(n_sections))
+
+    def round_shift(shift):
+        return f"(acc + {1 << (shift - 1)}LL) >> {shift}" if shift > 0 else "acc"
+
+    sections = "\n".join(f"""
+        /* Section {k}: coefficients scaled by 2^{shift} */
+        acc = {b0}LL * x + {b1}LL * x{k}_1 + {b2}LL * x{k}_2 - {a1}LL * y{k}_1 - {a2}LL * y{k}_2;
+        y = filter_saturate({round_shift(shift)});
+        x{k}_2 = x{k}_1;
+        x{k}_1 = x;
+        y{k}_2 = y{k}_1;
+        y{k}_1 = y;
+        x = y;""" for k, ((b0, b1, b2, a1, a2), shift) in enumerate(zip(design.coefficients, design.shifts)))
+
+    return f"""/**
+ * Auto-generated digital filter implementation
+ * Filter Type: Cascade of {n_sections} fixed-point Direct Form I biquads
+ * Number of zeros: {len(zeros)}
+ * Number of poles: {len(poles)}
+ * Sample format: {fmt}, signed fractions of full scale
+ */
+
+#include <stddef.h>
+#include <stdint.h>
+#include <stdio.h>
+#include <string.h>
+
+typedef {sample_type} filter_sample_t;
+
+#define FILTER_NUM_SECTIONS {n_sections}
+#define FILTER_SAMPLE_MAX {design.sample_max}LL
+#define FILTER_SAMPLE_MIN ({design.sample_min}LL)
+
+typedef struct {{
+    filter_sample_t x[FILTER_NUM_SECTIONS][2];
+    filter_sample_t y[FILTER_NUM_SECTIONS][2];
+}} filter_state_t;
+
+static inline filter_sample_t filter_saturate(int64_t value) {{
+    if (value > FILTER_SAMPLE_MAX) return (filter_sample_t)FILTER_SAMPLE_MAX;
+    if (value < FILTER_SAMPLE_MIN) return (filter_sample_t)FILTER_SAMPLE_MIN;
+    return (filter_sample_t)value;
+}}
+
+void filter_reset(filter_state_t *state) {{
+    memset(state, 0, sizeof(*state));
+}}
+
+/* Filter n samples from input into output; input and output may be the same buffer */
+void filter_process_block(filter_state_t *state, const filter_sample_t *input, filter_sample_t *output, size_t n) {{
+{load_state}
+    for (size_t i = 0; i < n; i++) {{
+        filter_sample_t x = input[i];
+        filter_sample_t y;
+        int64_t acc;
+{sections}
+
+        /* Output gain, scaled by 2^{design.output_shift} */
+        acc = {design.output_gain}LL * x;
+        output[i] = filter_saturate({round_shift(int(design.output_shift))});
+    }}
+{store_state}
+}}
+
+filter_sample_t filter_process_sample(filter_state_t *state, filter_sample_t input) {{
+    filter_sample_t output;
+    filter_process_block(state, &input, &output, 1);
+    return output;
+}}
+
+#ifdef FILTER_TEST
+int main(void) {{
+    filter_state_t state;
+    filter_sample_t samples[] = {{FILTER_SAMPLE_MAX / 2, 0, 0, 0, 0}};
+    size_t num_samples = sizeof(samples) / sizeof(samples[0]);
+
+    filter_reset(&state);
+    filter_process_block(&state, samples, samples, num_samples);
+    printf("Response to a half-scale impulse\\n");
+    for (size_t i = 0; i < num_samples; i++) {{
+        printf("%lld\\n", (long long)samples[i]);
+    }}
+    return 0;
+}}
+#endif
+"""
+
+
+C_CODE_FORMS = {
+    "Biquad Cascade (float)": lambda zeros, poles, gain: biquad_cascade_code(zeros, poles, gain, "float"),
+    "Biquad Cascade (double)": lambda zeros, poles, gain: biquad_cascade_code(zeros, poles, gain, "double"),
+    "Biquad Cascade (Q15 fixed point)": lambda zeros, poles, gain: fixed_point_code(zeros, poles, gain, "Q15"),
+    "Biquad Cascade (Q31 fixed point)": lambda zeros, poles, gain: fixed_point_code(zeros, poles, gain, "Q31"),
+    "Direct Form II (double)": direct_form_ii_code,
+}
+FIXED_POINT_FORMS = {
+    "Biquad Cascade (Q15 fixed point)": "Q15",
+    "Biquad Cascade (Q31 fixed point)": "Q31",
+}
@@ -0,0 +1,58 @@
+"""Filter library designs and the design file format written by Save Filter."""
+from scipy.signal import butter, cheby1, cheby2, ellip, bessel
+
+PREDEFINED_FILTERS = [
+    "Butterworth LPF", "Butterworth HPF", "Butterworth BPF",
+    "Chebyshev I LPF", "Chebyshev I HPF", "Chebyshev I BPF",
+    "Chebyshev II LPF", "Chebyshev II HPF", "Chebyshev II BPF",
+    "Bessel LPF", "Bessel HPF", "Bessel BPF",
+    "Elliptic LPF", "Elliptic HPF", "Elliptic BPF"
+]
+
+BAND_TYPES = {"LPF": "low", "HPF": "high", "BPF": "band"}
+STOPBAND_DB = 40  # Stop-band attenuation of the Chebyshev II and Elliptic designs
+
+
+def design_predefined_filter(name, order, cutoff, ripple=1):
+    """(zeros, poles, gain) for a library entry such as "Chebyshev I BPF".
+
+    cutoff is normalized to the Nyquist frequency; band-pass filters span
+    0.8 to 1.2 times the cutoff. ripple is the pass-band ripple in dB;
+    Chebyshev II has no pass-band ripple and ignores it.
+    """
+    family, band_type = name.rsplit(" ", 1)
+    if band_type not in BAND_TYPES:
+        raise ValueError(f"Unknown filter type: {name}")
+    btype = BAND_TYPES[band_type]
+    band = [cutoff * 0.8, cutoff * 1.2] if btype == "band" else cutoff
+
+    if family == "Butterworth":
+        return butter(order, band, btype=btype, output='zpk')
+    elif family == "Chebyshev I":
+        return cheby1(order, ripple, band, btype=btype, output='zpk')
+    elif family == "Chebyshev II":
+        return cheby2(order, STOPBAND_DB, band, btype=btype, output='zpk')
+    elif family == "Bessel":
+        return bessel(order, band, btype=btype, output='zpk')
+    elif family == "Elliptic":
+        return ellip(order, ripple, STOPBAND_DB, band, btype=btype, output='zpk')
+    raise ValueError(f"Unknown filter family: {name}")
+
+
+def write_design(path, zeros, poles, gain=1):
+    """Save a design: a "zeros,poles" header, the zeros line, the poles line and the gain line."""
+    with open(path, "w") as file:
+        file.write("zeros,poles\n")
+        file.write("{}\n".format(",".join(map(str, zeros))))
+        file.write("{}\n".format(",".join(map(str, poles))))
+        file.write("{}\n".format(gain))
+
+
+def read_design(path):
+    """Load (zeros, poles, gain) from a design file; files without a gain line get gain 1."""
+    with open(path, "r") as file:
+        lines = file.read().splitlines() + ["", "", ""]
+    zeros = [complex(z) for z in lines[1].split(",") if z.strip()]
+    poles = [complex(p) for p in lines[2].split(",") if p.strip()]
+    gain = float(lines[3]) if lines[3].strip() else 1
+    return zeros, poles, gain
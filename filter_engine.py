@@ -0,0 +1,334 @@
+"""Headless streaming filter engine.
+
+Holds a zero/pole/gain design together with the streaming filter state and
+has no Qt or matplotlib dependency, so the GUI, batch jobs, tests and
+benchmarks can all drive the same filtering code.
+"""
+from functools import lru_cache
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy import fft
+from scipy.signal import convolve, zpk2tf, zpk2sos, lfilter, lfilter_zi, sosfilt, sosfilt_zi
+
+from kernels import NumpySosKernel, sos_kernel
+
+FIR_MIN_TAPS = 16  # Shorter FIR designs stay on the section cascade
+FFT_MIN_TAPS = 256  # Below this, direct convolution wins at any block length
+FFT_MIN_WORK = 1 << 21  # Taps x block samples above which overlap-save beats direct convolution
+BACKENDS = ["scipy", "numpy", "numba", "native"]
+
+
+def design_key(zeros, poles, gain):
+    """Hashable identity of a zpk design; equal keys mean identical coefficients."""
+    return (
+        tuple(complex(z) for z in zeros),
+        tuple(complex(p) for p in poles),
+        complex(gain),
+    )
+
+
+@lru_cache(maxsize=32)
+def design_coefficients(key, dtype):
+    """Coefficients and unit initial state for a design_key, computed once per design.
+
+    Returns (b, a, sos, zi) where sos is None if the design has an unpaired
+    complex root, and zi is the steady-state filter state for a constant input
+    of 1. The arrays are shared between callers and must not be modified.
+    """
+    zeros, poles, gain = key
+    gain = gain.real if gain.imag == 0 else gain
+    b, a = zpk2tf(zeros, poles, gain)
+    b = np.real_if_close(np.atleast_1d(b))
+    a = np.real_if_close(np.atleast_1d(a))
+    try:
+        sos = zpk2sos(zeros, poles, gain).astype(dtype)
+    except ValueError:
+        sos = None  # Unpaired complex roots, use the transfer function
+
+    if sos is not None:
+        zi = sosfilt_zi(sos).astype(dtype)
+    elif max(len(b), len(a)) < 2:
+        zi = np.zeros(0)  # Pure gain, nothing to carry between blocks
+    else:
+        zi = lfilter_zi(b, a)
+    return b, a, sos, zi
+
+
+@lru_cache(maxsize=32)
+def fir_taps(key):
+    """Impulse response of a design_key whose poles all sit at the origin, else None.
+
+    With every pole at z = 0 the design is an FIR with one tap more than it
+    has zeros. Expanding hundreds of zeros into one zpk2tf polynomial, or
+    running a unit impulse through their sections, loses all accuracy, so
+    the taps are the inverse FFT of the response k * prod(1 - z e^-jw)
+    sampled at as many frequencies as there are taps. Each sample is summed
+    as logs of its root factors, which keeps the taps accurate to rounding
+    of the largest response value. Only valid for real designs, and the
+    array is shared between callers like design_coefficients'.
+    """
+    zeros, poles, gain = key
+    if any(poles):
+        return None
+    n_taps = len(zeros) + 1
+    unit_circle = np.exp(2j * np.pi * np.arange(n_taps) / n_taps)
+    with np.errstate(divide='ignore'):  # A zero on the grid gives log(0) = -inf, a response of 0
+        log_h = np.full(n_taps, np.log(gain))
+        for start in range(0, len(zeros), 256):
+            factors = 1 - np.outer(zeros[start:start + 256], 1 / unit_circle)
+            log_h += np.log(factors).sum(axis=0)
+    return fft.ifft(np.exp(log_h)).real
+
+
+class FilterEngine:
+    """Streaming filter for a zeros/poles/gain design.
+
+    Designs are run as a cascade of second-order sections (the same sections
+    cascade_realization exports), which stays stable at high orders and in
+    float32. Designs with a complex zero or pole that has no conjugate cannot
+    be split into real sections and fall back to the single transfer function.
+    Coefficients are cached per design, and setting the design that is
+    already loaded keeps the streaming state.
+
+    The filter state carries over between calls to process(), so a signal can
+    be fed in blocks of any size and gives the same output as filtering it in
+    one go. The first block after reset() starts from the steady-state
+    response to its first sample, like the GUI always did.
+
+    Blocks are either 1-D or (samples x channels). All channels go through
+    the design in one vectorized call, each with its own state, so the
+    channel count must stay the same until the next reset().
+
+    FIR designs (all poles at the origin) with at least FIR_MIN_TAPS taps are
+    run as a convolution instead, with the last taps - 1 input samples as the
+    streaming state. Blocks are convolved directly, or by FFT overlap-save
+    once the block is long enough for the FFTs to be cheaper, which makes
+    designs with thousands of taps practical.
+
+    Other backends run the section cascade through a kernel from kernels.py
+    instead of sosfilt: "numpy" (block matrix products), "numba" (a compiled
+    sample loop) or "native" (the C generated by codegen, compiled on first
+    use). Kernels filter float32 or float64 blocks into a preallocated
+    output and share sosfilt's state, so the backend can be switched
+    mid-stream. If Numba or a C compiler is missing the engine warns and
+    stays on SciPy.
+    """
+
+    def __init__(self, zeros=(), poles=(), gain=1.0, dtype=np.float64, backend="scipy"):
+        self.dtype = np.dtype(dtype)
+        self.design_key = None
+        self.backend = backend
+        self.set_design(zeros, poles, gain)
+
+    def set_design(self, zeros, poles, gain=1.0):
+        """Replace the design and reset the streaming state.
+
+        Returns False, leaving the state alone, if the design is unchanged.
+        """
+        key = design_key(zeros, poles, gain)
+        if key == self.design_key:
+            return False
+        self.design_key = key
+        self.zeros = list(zeros)
+        self.poles = list(poles)
+        self.gain = gain
+        self.b, self.a, self.sos, self.unit_state = design_coefficients(key, self.dtype)
+        # Designs with unpaired complex zeros stay on the transfer function
+        self.taps = fir_taps(key) if self.sos is not None else None
+        if self.taps is not None and len(self.taps) < FIR_MIN_TAPS:
+            self.taps = None
+        self.tap_spectra = {}  # FFT length -> spectrum of the taps, for overlap-save
+        self.set_backend(self.backend)
+        self.reset()
+        return True
+
+    def set_backend(self, backend):
+        """Choose one of BACKENDS for the section cascade; the streaming state is kept."""
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown filter backend: {backend}")
+        self.backend = backend
+        self.kernel = None
+        if self.sos is not None and self.taps is None:
+            self.kernel = sos_kernel(backend, self.sos)
+
+    def reset(self):
+        """Forget the streaming state; the next block starts a new stream."""
+        self.state = None
+
+    def initial_state(self, x0):
+        """Steady-state filter state for a constant input equal to x0 (a scalar or one value per channel)."""
+        return np.multiply.outer(self.unit_state, x0)
+
+    def process(self, block, out=None):
+        """Filter one block of samples and return the filtered block.
+
+        If out is given the result is written into it and out is returned.
+        With a kernel backend and a C-contiguous out of the engine's dtype,
+        the kernel writes there directly and the call allocates nothing.
+        """
+        block = np.asarray(block, dtype=self.dtype)
+        if block.size == 0:
+            return np.zeros_like(block) if out is None else out
+        if self.taps is not None:
+            filtered = self._process_fir(block)
+        else:
+            if self.state is None:
+                self.state = self.initial_state(block[0])
+            if self.kernel is not None:
+                self.state = np.ascontiguousarray(self.state, dtype=self.dtype)
+                if out is not None and out.dtype == self.dtype and out.flags.c_contiguous:
+                    return self.kernel(np.ascontiguousarray(block), self.state, out)
+                filtered = self.kernel(np.ascontiguousarray(block), self.state, np.empty_like(block))
+            elif self.sos is not None:
+                filtered, self.state = sosfilt(self.sos, block, axis=0, zi=self.state)
+            else:
+                filtered, self.state = lfilter(self.b, self.a, block, axis=0, zi=self.state)
+        if out is None:
+            return filtered
+        out[...] = filtered
+        return out
+
+    def process_blocks(self, blocks):
+        """Lazily filter an iterable of blocks, such as signal_io.iter_csv_blocks values."""
+        for block in blocks:
+            yield self.process(block)
+
+    def zero_phase(self, samples, out=None, block_size=65536):
+        """Filter a whole recording forward and backward, see zero_phase_filter.
+
+        Leaves the streaming state alone.
+        """
+        if self.sos is None:
+            raise ValueError("Zero-phase filtering needs a design that splits into second-order sections")
+        return zero_phase_filter(self.sos, samples, out, block_size)
+
+    def _process_fir(self, block):
+        n_taps = len(self.taps)
+        if self.state is None:
+            # A history of constant input gives the same steady state as the cascade
+            self.state = np.broadcast_to(block[0], (n_taps - 1,) + block.shape[1:])
+        buffer = np.concatenate((self.state, block))
+        self.state = buffer[len(block):].copy()
+        if n_taps >= FFT_MIN_TAPS and n_taps * len(block) >= FFT_MIN_WORK:
+            filtered = self._overlap_save(buffer)
+        else:
+            taps = self.taps.reshape((-1,) + (1,) * (block.ndim - 1))
+            filtered = convolve(buffer, taps, mode='valid', method='direct')
+        return filtered.astype(self.dtype, copy=False)
+
+    def _overlap_save(self, buffer):
+        """Valid part of convolving buffer with the taps, one FFT per frame of a fixed length."""
+        n_taps = len(self.taps)
+        n_out = len(buffer) - n_taps + 1
+        # Power-of-two frames of about 8x the taps, which keeps the set of cached spectra small
+        n_fft = 1 << int(np.ceil(np.log2(min(8 * n_taps, len(buffer)))))
+        step = n_fft - n_taps + 1
+        n_frames = -(-n_out // step)  # Ceiling division
+        padding = np.zeros((n_frames * step + n_taps - 1 - len(buffer),) + buffer.shape[1:], dtype=buffer.dtype)
+        frames = sliding_window_view(np.concatenate((buffer, padding)), n_fft, axis=0)[::step]
+        if n_fft not in self.tap_spectra:
+            self.tap_spectra[n_fft] = fft.rfft(self.taps.astype(self.dtype), n_fft)
+        # Frames are (frames, channels..., n_fft); the first taps - 1 outputs of each wrap around
+        filtered = fft.irfft(fft.rfft(frames, axis=-1) * self.tap_spectra[n_fft], n_fft, axis=-1)[..., n_taps - 1:]
+        return np.moveaxis(filtered, -1, 1).reshape((-1,) + buffer.shape[1:])[:n_out]
+
+
+class FilterBank:
+    """Several designs run side by side over one shared input stream.
+
+    The sections of all designs are stacked into one (designs, sections, 6)
+    array, with shorter cascades padded by pass-through sections, next to a
+    matching stacked state. Each input block is converted once and goes
+    through all designs in one kernels.NumpySosKernel call, which batches its
+    matrix products across the designs and writes every design's output into
+    its own row of one preallocated output. The file is read and converted
+    once however many designs are compared, but the filtering work still
+    grows with the number of designs. Like FilterEngine, blocks may be 1-D or
+    (samples x channels) and the state carries over between calls until
+    reset().
+    """
+
+    def __init__(self, designs, dtype=np.float64):
+        self.dtype = np.dtype(dtype)
+        coefficients = [design_coefficients(design_key(*design), self.dtype) for design in designs]
+        if any(sos is None for _, _, sos, _ in coefficients):
+            raise ValueError("Filter bank designs must split into real second-order sections")
+        n_sections = max([len(sos) for _, _, sos, _ in coefficients] + [1])
+        self.sos = np.zeros((len(coefficients), n_sections, 6), dtype=self.dtype)
+        self.sos[:, :, [0, 3]] = 1  # Pass-through padding, b = a = [1, 0, 0]
+        self.unit_state = np.zeros((len(coefficients), n_sections, 2), dtype=self.dtype)
+        for row, (_, _, sos, zi) in enumerate(coefficients):
+            self.sos[row, :len(sos)] = sos
+            self.unit_state[row, :len(zi)] = zi
+        self.kernel = NumpySosKernel(self.sos)
+        self.reset()
+
+    def __len__(self):
+        return len(self.sos)
+
+    def reset(self):
+        """Forget the streaming state of every design."""
+        self.state = None
+
+    def process(self, block, out=None):
+        """Filter one block through every design; returns shape (designs,) + block.shape.
+
+        If out is given it must be a C-contiguous array of that shape and the
+        engine's dtype, and the result is written into it.
+        """
+        block = np.ascontiguousarray(block, dtype=self.dtype)
+        if out is None:
+            out = np.empty((len(self),) + block.shape, dtype=self.dtype)
+        if block.size == 0:
+            return out
+        if self.state is None:
+            self.state = np.ascontiguousarray(np.multiply.outer(self.unit_state, block[0]))
+        return self.kernel(block, self.state, out)
+
+
+def zero_phase_padlen(sos):
+    """Edge padding used by zero_phase_filter, the same default as scipy's sosfiltfilt."""
+    trivial_zeros = np.sum(sos[:, 2] == 0)
+    trivial_poles = np.sum(sos[:, 5] == 0)
+    return 3 * (2 * len(sos) + 1 - min(trivial_zeros, trivial_poles))
+
+
+def zero_phase_filter(sos, samples, out=None, block_size=65536):
+    """Zero-phase forward-backward filtering of a recording, block_size samples at a time.
+
+    Gives the same result as sosfiltfilt with its default odd-extension
+    padding, but samples may be a read-only np.memmap and out a writable one
+    (any array of the same shape, allocated if None), since only one block
+    and the edge padding are held in memory. The forward pass writes into
+    out, and the backward pass runs over the blocks in reverse and
+    overwrites them in place. Samples are 1-D or (samples x channels).
+    """
+    n_samples = len(samples)
+    padlen = zero_phase_padlen(sos)
+    if n_samples <= padlen:
+        raise ValueError(f"Zero-phase filtering needs more than {padlen} samples for this design")
+    if out is None:
+        out = np.empty(np.shape(samples), dtype=sos.dtype)
+    unit_state = sosfilt_zi(sos)
+
+    # Odd extension: the signal mirrored through its end points
+    first = np.asarray(samples[0], dtype=sos.dtype)
+    last = np.asarray(samples[-1], dtype=sos.dtype)
+    left = 2 * first - np.asarray(samples[padlen:0:-1], dtype=sos.dtype)
+    right = 2 * last - np.asarray(samples[-2:-padlen - 2:-1], dtype=sos.dtype)
+
+    # Forward pass; the left padding only warms up the state
+    _, state = sosfilt(sos, left, axis=0, zi=np.multiply.outer(unit_state, left[0]))
+    for start in range(0, n_samples, block_size):
+        stop = min(start + block_size, n_samples)
+        out[start:stop], state = sosfilt(sos, np.asarray(samples[start:stop], dtype=sos.dtype), axis=0, zi=state)
+    right, _ = sosfilt(sos, right, axis=0, zi=state)
+
+    # Backward pass from the end of the right padding
+    _, state = sosfilt(sos, right[::-1], axis=0, zi=np.multiply.outer(unit_state, right[-1]))
+    for stop in range(n_samples, 0, -block_size):
+        start = max(stop - block_size, 0)
+        backward, state = sosfilt(sos, out[start:stop][::-1], axis=0, zi=state)
+        out[start:stop] = backward[::-1]
+    return out
@@ -0,0 +1,182 @@
+"""Fixed-point (Q15/Q31) quantization of a design's second-order sections.
+
+A FixedPointDesign is the integer-only filter that codegen emits for cores
+without an FPU. Each section runs in Direct Form I with one 64-bit
+accumulator and a single rounding, so the only internal overflow point is
+the saturated section output:
+
+    acc = b0 x + b1 x1 + b2 x2 - a1 y1 - a2 y2      (integer coefficients)
+    y   = saturate((acc + 2^(shift - 1)) >> shift)
+
+Samples are signed fractions of full scale with FRAC_BITS fractional bits.
+Each section has its own coefficient shift, so its largest coefficient keeps
+as many bits as the sample width allows. The sections are also scaled so the
+peak gain of the cascade up to each section is 1 (L-infinity scaling),
+and a final output gain restores the overall response. A full-scale
+sinusoid then never saturates an intermediate section.
+
+FixedPointDesign.filter is a bit-exact model of the generated C, and
+quantization_report compares the quantized design with the ideal one.
+"""
+import numpy as np
+from scipy.signal import sosfilt, sosfreqz, zpk2sos
+
+FRAC_BITS = {"Q15": 15, "Q31": 31}
+# Q31 coefficients give up two bits so five 62-bit products always fit the 64-bit accumulator
+COEFF_HEADROOM = {"Q15": 0, "Q31": 2}
+
+
+def _quantize(values, frac_bits, max_bits):
+    """Integers for values with the largest shift <= frac_bits that fits them in max_bits + 1 signed bits."""
+    limit = (1 << max_bits) - 1
+    peak = np.max(np.abs(values))
+    shift = frac_bits
+    while shift > 0 and np.round(peak * 2.0 ** shift) > limit:
+        shift -= 1
+    return np.round(np.asarray(values) * 2.0 ** shift).astype(np.int64), shift
+
+
+class FixedPointDesign:
+    """A zpk design quantized to Q15 or Q31 second-order sections.
+
+    coefficients holds one (b0, b1, b2, a1, a2) integer row per section,
+    shifts the right shift after each section's accumulation, and
+    output_gain/output_shift the final gain stage.
+    """
+
+    def __init__(self, zeros, poles, gain=1, fmt="Q15"):
+        if fmt not in FRAC_BITS:
+            raise ValueError(f"Unsupported fixed-point format: {fmt}")
+        self.fmt = fmt
+        self.frac_bits = FRAC_BITS[fmt]
+        self.sample_max = (1 << self.frac_bits) - 1
+        self.sample_min = -(1 << self.frac_bits)
+        self.sos = zpk2sos(zeros, poles, gain)  # Raises ValueError for unpaired complex roots
+
+        # L-infinity scaling: the cascade up to each section peaks at exactly 1
+        self.section_scales = np.ones(len(self.sos))
+        scaled = self.sos.copy()
+        previous_peak = 1.0
+        for k in range(len(self.sos)):
+            _, h = sosfreqz(self.sos[:k + 1], worN=4096)
+            peak = max(np.max(np.abs(h)), 1e-12)
+            self.section_scales[k] = previous_peak / peak
+            scaled[k, :3] *= self.section_scales[k]
+            previous_peak = peak
+        self.scaled_sos = scaled
+
+        coefficient_bits = self.frac_bits - COEFF_HEADROOM[fmt]
+        rows, shifts = [], []
+        for b0, b1, b2, _, a1, a2 in scaled:
+            row, shift = _quantize([b0, b1, b2, a1, a2], coefficient_bits, coefficient_bits)
+            rows.append(row)
+            shifts.append(shift)
+        self.coefficients = np.array(rows, dtype=np.int64).reshape(-1, 5)
+        self.shifts = np.array(shifts, dtype=np.int64)
+
+        # The cascade now has unit peak gain; the output stage puts the design's gain back
+        overall_gain = 1.0 / np.prod(self.section_scales)
+        (self.output_gain,), self.output_shift = _quantize([overall_gain], coefficient_bits, coefficient_bits)
+
+    @property
+    def section_sos(self):
+        """Floating-point sections with the quantized coefficients, without the output gain."""
+        sos = np.ones((len(self.coefficients), 6))
+        sos[:, [0, 1, 2, 4, 5]] = self.coefficients * 2.0 ** -self.shifts[:, None]
+        return sos
+
+    @property
+    def output_scale(self):
+        """The quantized output gain as a float."""
+        return self.output_gain * 2.0 ** -self.output_shift
+
+    @property
+    def quantized_sos(self):
+        """Floating-point sections of the whole quantized filter, output gain folded into the first."""
+        sos = self.section_sos
+        sos[0, :3] *= self.output_scale
+        return sos
+
+    def to_fixed(self, samples):
+        """Float samples in [-1, 1) as saturated integers of this format."""
+        scaled = np.round(np.asarray(samples, dtype=np.float64) * 2.0 ** self.frac_bits)
+        return np.clip(scaled, self.sample_min, self.sample_max).astype(np.int64)
+
+    def to_float(self, samples):
+        return np.asarray(samples, dtype=np.float64) * 2.0 ** -self.frac_bits
+
+    def _round_shift(self, acc, shift):
+        if shift > 0:
+            acc = (acc + (1 << (shift - 1))) >> shift
+        return min(max(acc, self.sample_min), self.sample_max)
+
+    def filter(self, samples):
+        """Bit-exact model of the generated C on integer samples, from zero state.
+
+        Slow (one Python step per sample and section); meant for verification.
+        """
+        coefficients = [tuple(int(c) for c in row) for row in self.coefficients]
+        shifts = [int(shift) for shift in self.shifts]
+        history = [[0, 0, 0, 0] for _ in coefficients]  # x1, x2, y1, y2
+        output = np.empty(len(samples), dtype=np.int64)
+        for i, x in enumerate(samples):
+            x = int(x)
+            for (b0, b1, b2, a1, a2), shift, h in zip(coefficients, shifts, history):
+                acc = b0 * x + b1 * h[0] + b2 * h[1] - a1 * h[2] - a2 * h[3]
+                y = self._round_shift(acc, shift)
+                h[1], h[0], h[3], h[2] = h[0], x, h[2], y
+                x = y
+            output[i] = self._round_shift(int(self.output_gain) * x, int(self.output_shift))
+        return output
+
+
+def quantization_report(design, n_points=8000, dynamic_range_db=60, impulse_length=8192):
+    """How far a FixedPointDesign is from its ideal design.
+
+    max_deviation_db is the largest magnitude error wherever the ideal
+    response is within dynamic_range_db of its peak. noise_gain is the sum
+    of squared impulse responses from every rounding point to the output
+    (each section output and the output stage), and noise_floor_dbfs the
+    resulting output noise power for rounding noise of one LSB step.
+    """
+    _, ideal = sosfreqz(design.sos, worN=n_points)
+    _, quantized = sosfreqz(design.quantized_sos, worN=n_points)
+    ideal_db = 20 * np.log10(np.maximum(np.abs(ideal), 1e-300))
+    quantized_db = 20 * np.log10(np.maximum(np.abs(quantized), 1e-300))
+    in_range = ideal_db >= ideal_db.max() - dynamic_range_db
+    max_deviation_db = float(np.max(np.abs(quantized_db - ideal_db)[in_range]))
+
+    # Rounding at section k goes through 1 / A_k, every later section and the output gain
+    section_sos = design.section_sos
+    impulse = np.zeros(impulse_length)
+    impulse[0] = 1
+    noise_gain = 1.0  # Output stage rounding
+    for k in range(len(section_sos)):
+        recursive_part = np.concatenate(([1, 0, 0], section_sos[k, 3:]))
+        response = design.output_scale * sosfilt(np.vstack((recursive_part, section_sos[k + 1:])), impulse)
+        noise_gain += float(np.sum(response ** 2))
+
+    lsb = 2.0 ** -design.frac_bits
+    poles = np.concatenate([np.roots(section[3:]) for section in section_sos])
+    return {
+        "format": design.fmt,
+        "max_deviation_db": max_deviation_db,
+        "noise_gain": noise_gain,
+        "noise_gain_db": float(10 * np.log10(noise_gain)),
+        "noise_floor_dbfs": float(10 * np.log10(noise_gain * lsb ** 2 / 12)),
+        "stable": bool(np.all(np.abs(poles) < 1)),
+        "section_shifts": design.shifts.tolist(),
+    }
+
+
+def describe_quantization(report):
+    """Short human-readable summary of a quantization_report."""
+    lines = [
+        f"{report['format']} quantization",
+        f"Max response deviation: {report['max_deviation_db']:.3f} dB",
+        f"Round-off noise gain: {report['noise_gain']:.2f} ({report['noise_gain_db']:.1f} dB)",
+        f"Output noise floor: {report['noise_floor_dbfs']:.1f} dBFS",
+    ]
+    if not report["stable"]:
+        lines.append("Warning: a quantized pole lies on or outside the unit circle")
+    return "\n".join(lines)
@@ -0,0 +1,121 @@
+"""Frequency response of a zero/pole design, evaluated on a fixed grid."""
+import numpy as np
+
+
+class ResponseEvaluator:
+    """H(e^jw) = prod(e^jw - z) / prod(e^jw - p) on a fixed frequency grid.
+
+    The factor vector (e^jw - r) of every root is cached, together with the
+    numerator and denominator products. Moving a single root multiplies one
+    product by the ratio of its new factor to its old one, so drag feedback
+    costs O(grid) however many roots the design has. The products are rebuilt
+    from the cached factors when an old factor vanishes on the grid, and every
+    refresh_interval moves to keep rounding errors from piling up.
+
+    The magnitude plot, phase plot and group delay all read from one
+    evaluator, so each design version is evaluated once on one grid. Values
+    derived from H are cached until the design changes again.
+    """
+
+    refresh_interval = 100
+
+    def __init__(self, n_points=8000):
+        # Same grid as freqz(worN=n_points): n_points frequencies in [0, pi)
+        self.w = np.linspace(0, np.pi, n_points, endpoint=False)
+        self.unit_circle = np.exp(1j * self.w)
+        self.version = 0  # Bumped on every design change
+        self.zeros = None
+        self.set_design([], [])
+
+    def set_design(self, zeros, poles):
+        """Evaluate a design from scratch, unless it is the one already held."""
+        if self.zeros is not None and self.matches(zeros, poles):
+            return
+        self.zeros = list(zeros)
+        self.poles = list(poles)
+        self.zero_factors = [self.unit_circle - z for z in self.zeros]
+        self.pole_factors = [self.unit_circle - p for p in self.poles]
+        self.numerator = self._product(self.zero_factors)
+        self.denominator = self._product(self.pole_factors)
+        self.moves = 0
+        self._changed()
+
+    def matches(self, zeros, poles):
+        """True if the evaluator holds exactly this design."""
+        return list(zeros) == self.zeros and list(poles) == self.poles
+
+    def move_zero(self, index, new_zero):
+        self.zeros[index] = new_zero
+        self.numerator = self._move(self.zero_factors, self.numerator, index, new_zero)
+        self._count_move()
+        self._changed()
+
+    def move_pole(self, index, new_pole):
+        self.poles[index] = new_pole
+        self.denominator = self._move(self.pole_factors, self.denominator, index, new_pole)
+        self._count_move()
+        self._changed()
+
+    @property
+    def h(self):
+        return self._cached("h", lambda: self.numerator / self.denominator)
+
+    @property
+    def magnitude_db(self):
+        def compute():
+            with np.errstate(divide='ignore'):
+                return 20 * np.log10(np.abs(self.h))
+        return self._cached("magnitude_db", compute)
+
+    @property
+    def phase(self):
+        return self._cached("phase", lambda: np.angle(self.h))
+
+    @property
+    def group_delay(self):
+        """Group delay in samples, -d(phase)/dw, summed analytically over the roots.
+
+        Each factor (e^jw - r) adds Re(e^jw / (e^jw - r)) to d(phase)/dw.
+        The causal filter the engine runs, k * prod(1 - z e^-jw) / prod(1 - p e^-jw),
+        also carries e^-jw(zeros - poles), which adds one sample of delay per
+        zero in excess of the poles. Frequencies where a root sits on the grid
+        come out as inf or nan.
+        """
+        def compute():
+            delay = np.full_like(self.w, len(self.zeros) - len(self.poles))
+            with np.errstate(divide='ignore', invalid='ignore'):
+                for factor in self.pole_factors:
+                    delay += np.real(self.unit_circle / factor)
+                for factor in self.zero_factors:
+                    delay -= np.real(self.unit_circle / factor)
+            return delay
+        return self._cached("group_delay", compute)
+
+    def _changed(self):
+        self.version += 1
+        self._derived = {}
+
+    def _cached(self, name, compute):
+        if name not in self._derived:
+            self._derived[name] = compute()
+        return self._derived[name]
+
+    def _move(self, factors, product, index, root):
+        old_factor = factors[index]
+        factors[index] = self.unit_circle - root
+        if np.min(np.abs(old_factor)) < 1e-12:
+            return self._product(factors)  # Old root sat on the grid, cannot divide it out
+        return product * (factors[index] / old_factor)
+
+    def _count_move(self):
+        self.moves += 1
+        if self.moves >= self.refresh_interval:
+            self.moves = 0
+            self.numerator = self._product(self.zero_factors)
+            self.denominator = self._product(self.pole_factors)
+
+    def _product(self, factors):
+        product = np.ones_like(self.unit_circle)
+        for factor in factors:
+            product *= factor
+        return product
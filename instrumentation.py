@@ -0,0 +1,249 @@
+"""Per-stage timing of the real-time loop, with a stats dialog and JSON export.
+
+Instrumentation wraps the stage methods of a running FilterDesignApp, its
+filter engines and its plot canvases in timing wrappers. The wrappers are
+set as instance attributes on enable() and removed again on disable(), so
+when instrumentation is off the loop runs the plain methods at no cost.
+"""
+import json
+import time
+
+import numpy as np
+from PyQt5.QtCore import QTimer
+from PyQt5.QtWidgets import (
+    QDialog, QFileDialog, QHBoxLayout, QLabel, QPushButton, QTableWidget, QTableWidgetItem, QVBoxLayout
+)
+
+from ring_buffer import RingBuffer
+
+
+class StageTimes:
+    """Rolling window of the last `history` durations of one stage, in seconds."""
+
+    def __init__(self, history):
+        self.durations = RingBuffer(history)
+        self.calls = 0  # All calls, not only those still in the window
+
+    def add(self, duration):
+        self.durations.append(duration)
+        self.calls += 1
+
+    def clear(self):
+        self.durations.clear()
+        self.calls = 0
+
+    def summary(self):
+        """Call count and mean/p50/p99/max of the window in milliseconds."""
+        durations = 1000 * self.durations.latest()
+        if len(durations) == 0:
+            return {"calls": self.calls}
+        p50, p99 = np.percentile(durations, [50, 99])
+        return {"calls": self.calls, "mean_ms": float(durations.mean()), "p50_ms": float(p50),
+                "p99_ms": float(p99), "max_ms": float(durations.max())}
+
+    def histogram(self, bins=20):
+        """Counts and edges (ms) of the durations in the window, on log-spaced bins."""
+        durations = 1000 * self.durations.latest()
+        if len(durations) == 0:
+            return np.zeros(bins, dtype=int), np.zeros(bins + 1)
+        low, high = max(durations.min(), 1e-3), max(durations.max(), 2e-3)
+        return np.histogram(durations, bins=np.geomspace(low, high, bins + 1))
+
+
+class Instrumentation:
+    """Timing of the real-time loop stages of a FilterDesignApp.
+
+    Stages, each timed per call:
+        process_next_point      one processing timer tick
+        filter                  filter_engine.process, one block of the loaded signal
+        mouse filter            mouse_filter_engine.process, one mouse sample
+        refresh_display         one display timer frame
+        update_plots            redraw of the signal plots, slicing included
+        update_mouse_plot       redraw of the mouse plots
+        canvas.draw             full redraws (paging, rescaling the axes)
+        canvas.blit             blitted frames
+
+    Tick jitter is the gap between processing ticks minus the timer
+    interval. A tick or frame misses its deadline when its work takes longer
+    than the timer interval or the display frame time.
+    """
+
+    def __init__(self, app, history=1000):
+        self.app = app
+        self.history = history
+        self.enabled = False
+        self._wrapped = []  # (owner, name, original instance attribute or None)
+        self.stages = {}
+        self.jitter = StageTimes(history)
+        self.reset()
+
+    def reset(self):
+        for times in self.stages.values():
+            times.clear()
+        self.jitter.clear()
+        self.deadlines_missed = {"process_next_point": 0, "refresh_display": 0}
+        self._last_tick = None
+
+    def enable(self):
+        if self.enabled:
+            return
+        app = self.app
+        self._wrap(app, "process_next_point", self._timed_tick)
+        self._wrap(app.filter_engine, "process", self._timed("filter"))
+        self._wrap(app.mouse_filter_engine, "process", self._timed("mouse filter"))
+        self._wrap(app, "refresh_display", self._timed_frame)
+        self._wrap(app, "update_plots", self._timed("update_plots"))
+        self._wrap(app, "update_mouse_plot", self._timed("update_mouse_plot"))
+        canvases = {id(renderer.canvas): renderer.canvas
+                    for renderer in (app.original_renderer, app.filtered_renderer)}
+        for canvas in canvases.values():
+            self._wrap(canvas, "draw", self._timed("canvas.draw"))
+            self._wrap(canvas, "blit", self._timed("canvas.blit"))
+        self.enabled = True
+
+    def disable(self):
+        for owner, name, original in reversed(self._wrapped):
+            if original is None:
+                delattr(owner, name)  # Back to the class method
+            else:
+                setattr(owner, name, original)
+        self._wrapped = []
+        self._last_tick = None
+        self.enabled = False
+
+    def snapshot(self):
+        """All statistics as a JSON-serializable dict."""
+        histograms = {}
+        for name, times in self.stages.items():
+            counts, edges = times.histogram()
+            histograms[name] = {"counts": counts.tolist(), "edges_ms": edges.tolist()}
+        return {
+            "stages": {name: times.summary() for name, times in self.stages.items()},
+            "histograms": histograms,
+            "tick_jitter": self.jitter.summary(),
+            "deadlines_missed": dict(self.deadlines_missed),
+            "tick_interval_ms": self.app.tick_interval(),
+            "frame_interval_ms": 1000 / self.app.display_fps,
+        }
+
+    def export_json(self, path):
+        with open(path, "w") as file:
+            json.dump(self.snapshot(), file, indent=2)
+
+    def _wrap(self, owner, name, make_wrapper):
+        original = owner.__dict__.get(name)
+        setattr(owner, name, make_wrapper(getattr(owner, name)))
+        self._wrapped.append((owner, name, original))
+
+    def _stage(self, name):
+        if name not in self.stages:
+            self.stages[name] = StageTimes(self.history)
+        return self.stages[name]
+
+    def _timed(self, name):
+        def make_wrapper(method):
+            stage = self._stage(name)
+
+            def timed(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return method(*args, **kwargs)
+                finally:
+                    stage.add(time.perf_counter() - start)
+            return timed
+        return make_wrapper
+
+    def _timed_tick(self, method):
+        stage = self._stage("process_next_point")
+
+        def timed():
+            start = time.perf_counter()
+            interval = self.app.tick_interval() / 1000
+            if self._last_tick is not None:
+                self.jitter.add(start - self._last_tick - interval)
+            self._last_tick = start
+            method()
+            duration = time.perf_counter() - start
+            stage.add(duration)
+            if duration > interval:
+                self.deadlines_missed["process_next_point"] += 1
+        return timed
+
+    def _timed_frame(self, method):
+        stage = self._stage("refresh_display")
+
+        def timed():
+            start = time.perf_counter()
+            method()
+            duration = time.perf_counter() - start
+            stage.add(duration)
+            if duration > 1 / self.app.display_fps:
+                self.deadlines_missed["refresh_display"] += 1
+        return timed
+
+
+class StatsDialog(QDialog):
+    """Live table of the Instrumentation statistics, refreshed twice a second."""
+
+    columns = ["calls", "mean_ms", "p50_ms", "p99_ms", "max_ms"]
+
+    def __init__(self, instrumentation, parent=None):
+        super().__init__(parent)
+        self.instrumentation = instrumentation
+        self.setWindowTitle("Real-Time Loop Timings")
+        self.setGeometry(200, 200, 700, 400)
+
+        layout = QVBoxLayout()
+        self.table = QTableWidget(0, len(self.columns))
+        self.table.setHorizontalHeaderLabels(["Calls", "Mean (ms)", "p50 (ms)", "p99 (ms)", "Max (ms)"])
+        layout.addWidget(self.table)
+        self.summary_label = QLabel()
+        layout.addWidget(self.summary_label)
+
+        button_layout = QHBoxLayout()
+        reset_button = QPushButton("Reset")
+        reset_button.clicked.connect(self.reset)
+        export_button = QPushButton("Export JSON")
+        export_button.clicked.connect(self.export_json)
+        close_button = QPushButton("Close")
+        close_button.clicked.connect(self.close)
+        button_layout.addWidget(reset_button)
+        button_layout.addWidget(export_button)
+        button_layout.addWidget(close_button)
+        layout.addLayout(button_layout)
+        self.setLayout(layout)
+
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.timeout.connect(self.refresh)
+        self.refresh_timer.start(500)
+        self.refresh()
+
+    def refresh(self):
+        snapshot = self.instrumentation.snapshot()
+        rows = dict(snapshot["stages"], **{"tick jitter": snapshot["tick_jitter"]})
+        self.table.setRowCount(len(rows))
+        self.table.setVerticalHeaderLabels(list(rows))
+        for row, summary in enumerate(rows.values()):
+            for column, key in enumerate(self.columns):
+                value = summary.get(key)
+                text = "" if value is None else str(value) if key == "calls" else f"{value:.3f}"
+                self.table.setItem(row, column, QTableWidgetItem(text))
+        missed = snapshot["deadlines_missed"]
+        state = "recording" if self.instrumentation.enabled else "off"
+        self.summary_label.setText(
+            f"Timings {state}. Missed deadlines: {missed['process_next_point']} ticks "
+            f"({snapshot['tick_interval_ms']} ms), {missed['refresh_display']} frames "
+            f"({snapshot['frame_interval_ms']:.0f} ms)")
+
+    def reset(self):
+        self.instrumentation.reset()
+        self.refresh()
+
+    def export_json(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Export Timings", "", "JSON Files (*.json)")
+        if path:
+            self.instrumentation.export_json(path)
+
+    def closeEvent(self, event):
+        self.refresh_timer.stop()
+        super().closeEvent(event)
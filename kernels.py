@@ -0,0 +1,250 @@
+"""Pluggable kernels for FilterEngine's second-order section cascade.
+
+A kernel is built for one sos array and called as
+
+    kernel(block, state, out)
+
+with a C-contiguous block of the sections' dtype (float32 or float64),
+either 1-D or (samples x channels), and the state in the layout of
+sosfilt's zi, (sections, 2) or (sections, 2, channels). It writes the
+filtered block into the preallocated out, which may be the block itself,
+updates the state in place and returns out. The state is therefore the
+same under every kernel, and FilterEngine can switch between them
+mid-stream.
+
+    numpy       NumpySosKernel, block state-space matrix products; needs
+                nothing beyond NumPy.
+    numba       NumbaSosKernel, the plain biquad loop compiled by Numba, if
+                Numba is installed and compiles it.
+    native      native.NativeSosKernel, the C from codegen compiled with the
+                local C compiler.
+
+sos_kernel(backend, sos) builds the kernel for a backend name. The "scipy"
+backend has no kernel and runs sosfilt.
+"""
+import math
+import warnings
+from functools import lru_cache
+
+import numpy as np
+from scipy.signal import sosfilt
+
+CHUNK = 64  # Samples per NumpySosKernel matrix product
+
+
+def _sos_cascade(sos, block, state, out):
+    """Transposed Direct Form II cascade on (samples, channels) with (sections, 2, channels) state."""
+    n_samples, n_channels = block.shape
+    for c in range(n_channels):
+        for i in range(n_samples):
+            x = block[i, c]
+            for k in range(sos.shape[0]):
+                y = sos[k, 0] * x + state[k, 0, c]
+                state[k, 0, c] = sos[k, 1] * x - sos[k, 4] * y + state[k, 1, c]
+                state[k, 1, c] = sos[k, 2] * x - sos[k, 5] * y
+                x = y
+            out[i, c] = x
+
+
+@lru_cache(maxsize=None)
+def _numba_sos_cascade():
+    """_sos_cascade compiled by Numba; numba is imported on first use, and ImportError raised without it."""
+    import numba
+    return numba.njit(cache=True, nogil=True)(_sos_cascade)
+
+
+def _as_columns(array, n_samples):
+    """A (samples, channels) view of a 1-D or 2-D contiguous array."""
+    return array.reshape(n_samples, -1)
+
+
+class NumbaSosKernel:
+    """The section cascade as a sample loop compiled by Numba, one compilation per dtype.
+
+    Raises ImportError if Numba is not installed.
+    """
+
+    def __init__(self, sos):
+        self.sos = np.ascontiguousarray(sos)
+        self.dtype = self.sos.dtype
+        self.cascade = _numba_sos_cascade()
+
+    def __call__(self, block, state, out):
+        n_samples = len(block)
+        self.cascade(self.sos, _as_columns(block, n_samples), state.reshape(len(self.sos), 2, -1),
+                     _as_columns(out, n_samples))
+        return out
+
+    def compile(self):
+        """Compile for the sections' dtype now by filtering one zero sample, so Numba errors surface here."""
+        block = np.zeros(1, dtype=self.dtype)
+        self(block, np.zeros((len(self.sos), 2), dtype=self.dtype), np.empty_like(block))
+
+
+class NumpySosKernel:
+    """The section cascade as block state-space matrix products.
+
+    The cascade is linear in its input and its state. With the state s
+    flattened to the 2 * sections values of sosfilt's zi, a chunk x of n
+    samples gives
+
+        y      = D x + C s
+        s_next = B x + A s
+
+    where D is the lower-triangular Toeplitz matrix of the impulse response.
+    The matrices are found once per chunk length by running sosfilt on unit
+    inputs and unit states. A block is split into chunks of `chunk` samples,
+    one workspace row per chunk and channel holding its input and start
+    state. The chunk end states come from a doubling scan, log2 of the chunk
+    count matrix products with powers of A, and the outputs of all chunks
+    from one more product, so there is no Python loop over samples or
+    chunks. The workspaces only grow, so steady streaming allocates nothing
+    per block.
+
+    sos may also be a stack of cascades, (designs, sections, 6), as in
+    FilterBank. Every design then filters the same block, the state and out
+    gain a leading designs axis, and each product above runs for all
+    designs in one batched call.
+    """
+
+    def __init__(self, sos, chunk=CHUNK):
+        self.sos = np.asarray(sos)
+        self.dtype = self.sos.dtype
+        self.stack = self.sos if self.sos.ndim == 3 else self.sos[np.newaxis]
+        self.n_designs = len(self.stack)
+        self.chunk = chunk
+        self.n_states = 2 * self.stack.shape[1]
+        self.matrices = {}  # Chunk length -> transposed [D C] and [B A] per design, padded to chunk + n_states rows
+        self.powers = []  # Transposed A^1, A^2, A^4, ... per design, for the full chunk length
+        self.buffers = {}  # Workspace name -> flat buffer that only grows
+
+    def __call__(self, block, state, out):
+        n_samples = len(block)
+        x = _as_columns(block, n_samples)
+        n_designs, n_states, n_channels = self.n_designs, self.n_states, x.shape[1]
+        y = out.reshape(n_designs, n_samples, n_channels)
+        s = state.reshape(n_designs, n_states, n_channels)
+        chunk = self.chunk
+        n_chunks, remainder = divmod(n_samples, chunk)
+        n_full = n_chunks * chunk
+        start = self._workspace("start", (n_designs, n_channels, n_states))  # Start state, transposed
+        start[...] = s.transpose(0, 2, 1)
+
+        if n_chunks:
+            # Per design, one row per chunk and channel: the chunk's input, then the state it starts from
+            rows = self._workspace("rows", (n_designs, n_chunks, n_channels, chunk + n_states))
+            flat_rows = rows.reshape(n_designs, -1, chunk + n_states)
+            output_t, state_t = self._chunk_matrices(chunk)
+            rows[:, :, :, :chunk] = x[:n_full].reshape(n_chunks, chunk, n_channels).transpose(0, 2, 1)
+
+            # Chunk end states: ends[k] = B x_k + A ends[k - 1], starting from s
+            ends = self._workspace("ends", (n_designs, n_chunks, n_channels, n_states))
+            scratch = self._workspace("scratch", ends.shape)
+            np.matmul(flat_rows[:, :, :chunk], state_t[:, :chunk], out=ends.reshape(n_designs, -1, n_states))
+            np.matmul(start, state_t[:, chunk:], out=scratch[:, 0])
+            ends[:, 0] += scratch[:, 0]
+            step = 1
+            for power_t in self._powers(n_chunks):
+                # Add in the end state from step chunks back, carried over the chunks between
+                scratch[:, :step] = ends[:, :step]
+                np.matmul(ends[:, :-step].reshape(n_designs, -1, n_states), power_t,
+                          out=scratch[:, step:].reshape(n_designs, -1, n_states))
+                scratch[:, step:] += ends[:, step:]
+                ends, scratch = scratch, ends
+                step *= 2
+
+            rows[:, 0, :, chunk:] = start
+            rows[:, 1:, :, chunk:] = ends[:, :-1]
+            start[...] = ends[:, -1]
+            if n_channels == 1:
+                np.matmul(flat_rows, output_t, out=y[:, :n_full].reshape(n_designs, n_chunks, chunk))
+            else:
+                outputs = self._workspace("outputs", (n_designs, n_chunks * n_channels, chunk))
+                np.matmul(flat_rows, output_t, out=outputs)
+                y[:, :n_full].reshape(n_designs, n_chunks, chunk, n_channels)[...] = (
+                    outputs.reshape(n_designs, n_chunks, n_channels, chunk).transpose(0, 1, 3, 2))
+
+        if remainder:
+            row = self._workspace("row", (n_designs, n_channels, chunk + n_states))
+            row[:, :, :remainder] = x[n_full:].T
+            row[:, :, remainder:chunk] = 0
+            row[:, :, chunk:] = start
+            output_t, state_t = self._chunk_matrices(remainder)
+            np.matmul(row, output_t, out=y[:, n_full:].transpose(0, 2, 1))
+            np.matmul(row, state_t, out=start)
+        s[...] = start.transpose(0, 2, 1)
+        return out
+
+    def _workspace(self, name, shape):
+        """A C-contiguous array of shape on a reused buffer, so reshaping it always gives a view."""
+        size = math.prod(shape)
+        if len(self.buffers.get(name, ())) < size:
+            self.buffers[name] = np.empty(size, dtype=self.dtype)
+        return self.buffers[name][:size].reshape(shape)
+
+    def _powers(self, n_chunks):
+        """Transposed A^1, A^2, A^4, ..., as many as the scan over n_chunks chunk states takes."""
+        n_steps = (n_chunks - 1).bit_length()
+        if len(self.powers) < n_steps:
+            # Squared in float64, then rounded to the sample type
+            power = np.array([final[:, self.chunk:].T for _, final in self._unit_responses(self.chunk)])
+            self.powers = []
+            for _ in range(n_steps):
+                self.powers.append(np.ascontiguousarray(power, dtype=self.dtype))
+                power = power @ power
+        return self.powers[:n_steps]
+
+    def _chunk_matrices(self, n):
+        if n not in self.matrices:
+            # Inputs past n are padding in the workspace row, so their rows stay zero
+            output_t = np.zeros((self.n_designs, self.chunk + self.n_states, n), dtype=self.dtype)
+            state_t = np.zeros((self.n_designs, self.chunk + self.n_states, self.n_states), dtype=self.dtype)
+            for design, (outputs, final) in enumerate(self._unit_responses(n)):
+                output_t[design, :n] = outputs[:, :n].T
+                output_t[design, self.chunk:] = outputs[:, n:].T
+                state_t[design, :n] = final[:, :n].T
+                state_t[design, self.chunk:] = final[:, n:].T
+            self.matrices[n] = output_t, state_t
+        return self.matrices[n]
+
+    def _unit_responses(self, n):
+        return [_unit_responses(sos, n) for sos in self.stack]
+
+
+def _unit_responses(sos, n):
+    """Outputs (n, n + states) and final states (states, n + states) of the cascade over n samples, in float64.
+
+    Column j < n is a unit impulse at input j from zero state, and the
+    remaining columns are each unit state with zero input.
+    """
+    n_states = 2 * len(sos)
+    inputs = np.zeros((n, n + n_states))
+    inputs[:, :n] = np.eye(n)
+    states = np.zeros((n_states, n + n_states))
+    states[:, n:] = np.eye(n_states)
+    outputs, final = sosfilt(sos.astype(np.float64), inputs, axis=0, zi=states.reshape(len(sos), 2, -1))
+    return outputs, final.reshape(n_states, -1)
+
+
+def sos_kernel(backend, sos):
+    """The kernel of a backend for float32 or float64 sections.
+
+    Returns None for "scipy", and, with a warning, when the backend's
+    compiler (Numba or a C compiler) is not available. A Numba kernel is
+    compiled and run on one sample before it is returned, so a Numba that
+    imports but cannot compile the loop also falls back.
+    """
+    if backend == "numpy":
+        return NumpySosKernel(sos)
+    if backend == "numba":
+        try:
+            kernel = NumbaSosKernel(sos)
+            kernel.compile()
+        except Exception as e:  # ImportError without Numba, or any Numba typing or compilation error
+            warnings.warn(f"Numba filter backend unavailable, using SciPy: {e}")
+            return None
+        return kernel
+    if backend == "native":
+        from native import sos_kernel as native_sos_kernel  # Imported on demand, only this backend needs a compiler
+        return native_sos_kernel(sos)
+    return None
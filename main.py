@@ -3,14 +3,13 @@ import numpy as np
 import matplotlib.pyplot as plt
 import time
 import csv
-import scipy.signal as signal
 from scipy.signal import (
-    freqz, zpk2tf, butter, cheby1, cheby2, ellip, bessel, freqz_zpk,
+    zpk2tf, freqz_zpk,
     zpk2sos, tf2zpk, lfilter
 )
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QVBoxLayout, QHBoxLayout, QWidget, QPushButton,
-    QLabel, QSlider, QFileDialog, QCheckBox, QComboBox, QTableWidget, QMessageBox, QDialog, QTabWidget, QGraphicsView, QGraphicsScene
+    QLabel, QSlider, QFileDialog, QCheckBox, QComboBox, QTableWidget, QMessageBox, QDialog, QInputDialog, QTabWidget, QGraphicsView, QGraphicsScene
 )
 from PyQt5.QtCore import Qt, QTimer
 from PyQt5.QtGui import QCursor
@@ -20,6 +19,15 @@ from matplotlib.backends.backend_qt5agg import (
 )
 from matplotlib.patches import Circle
 from scipy.signal import iirfilter
+from filter_engine import FilterEngine
+from rendering import BlitLinePlot
+from ring_buffer import RingBuffer
+from frequency_response import ResponseEvaluator
+from signal_io import open_signal, read_csv_signal
+from filter_designs import PREDEFINED_FILTERS, design_predefined_filter, read_design, write_design
+from instrumentation import Instrumentation, StatsDialog
+from codegen import C_CODE_FORMS, FIXED_POINT_FORMS
+from fixed_point import FixedPointDesign, describe_quantization, quantization_report
 
 class FilterDesignApp(QMainWindow):
     def __init__(self):
@@ -47,21 +55,35 @@ class FilterDesignApp(QMainWindow):
         self.unit_circle_radius = 1
         self.sample_rate = 1000
         self.signal = np.random.randn(10000)  # Example lengthy signal
+        self.x_values = np.zeros(0)  # Sample times of a loaded CSV signal
+        self.signal_file = None  # Loaded binary signal, whose times are computed on demand
         self.filtered_signal = np.zeros_like(self.signal)
         self.index = 0  # Current processing index
 
         self.speed = 10  # Default points per second
+        self.block_size = 1  # Most samples filtered per engine call
         self.timer = QTimer()
-        self.timer.timeout.connect(self.process_next_point)
+        # Slots are looked up on every tick, so Instrumentation can swap in timed versions
+        self.timer.timeout.connect(lambda: self.process_next_point())
+
+        # Plots refresh on their own timer, capped at display_fps, independent of the processing rate
+        self.display_fps = 30
+        self.display_timer = QTimer()
+        self.display_timer.timeout.connect(lambda: self.refresh_display())
+        self.displayed_index = 0  # Signal index shown by the last frame
+        self.mouse_frame_pending = False  # New mouse samples since the last frame
+        self.stream_clock = None  # (perf_counter time, index) the processing rate is paced from
         self.filtering_active = False  # To manage the toggle button state
-        self.x_scale_factor = 1.0  # Scaling factor for x-axis
-        self.mouse_signal = []
-        self.filtered_mouse_signal = []
-        self.mouse_time = []  # Store timestamps
+        self.mouse_history = 10000  # Mouse samples kept for display and load_signal_from_mouse
+        self.mouse_signal = RingBuffer(self.mouse_history)
+        self.filtered_mouse_signal = RingBuffer(self.mouse_history)
+        self.mouse_time = RingBuffer(self.mouse_history)  # Store timestamps
         self.start_time = time.time()
         self.prev_mouse_y = None
-        self.filter_b, self.filter_a = [1.0, -0.5], [1.0, -0.5]  # Updated default filter coefficients
-        self.filter_state = None
+        # Separate engines so the loaded signal and the mouse stream keep their own filter state
+        self.filter_engine = FilterEngine()
+        self.mouse_filter_engine = FilterEngine()
+        self.zero_phase_ready = False  # filtered_signal holds the zero-phase result for the current design
 
         self.window_size = 100  # Number of points to display dynamically
         self.enable_mouse=False
@@ -69,6 +91,10 @@ class FilterDesignApp(QMainWindow):
         self.selected_point = None
         self.selected_type = None
 
+        # Frequency response shared by the magnitude and phase plots, updated one root at a time while dragging
+        self.freq_response_evaluator = ResponseEvaluator()
+        self.magnitude_line = None
+
         self.all_pass_filters = {
             "Default first-order all-pass filter with a real pole at 0.5": self.get_butterworth_filter,
             "Default first-order all-pass filter with a real pole at 0.7": self.get_chebyshev_filter,
@@ -114,9 +140,10 @@ class FilterDesignApp(QMainWindow):
         self.freq_response_canvas.figure.subplots_adjust(bottom=0.1,top=0.95,left=0.1,right=0.95)
         self.graph_layout.addWidget(self.freq_response_canvas)
 
-        # Phase Response Plot
+        # Phase Response Plot, with the group delay on its own y-axis
         self.phase_response_canvas, self.phase_response_ax = self.create_plot_canvas()
-        self.phase_response_canvas.figure.subplots_adjust(bottom=0.18,top=0.90,left=0.1,right=0.95)
+        self.group_delay_ax = self.phase_response_ax.twinx()
+        self.phase_response_canvas.figure.subplots_adjust(bottom=0.18,top=0.90,left=0.1,right=0.88)
         self.graph_layout.addWidget(self.phase_response_canvas)
 
 
@@ -133,20 +160,16 @@ class FilterDesignApp(QMainWindow):
         # Original Signal Plot
         self.original_fig, self.original_ax = plt.subplots()
         self.original_canvas = FigureCanvas(self.original_fig)
-        self.original_ax.set_title("Original Signal")
-        self.original_ax.set_xlim(0, 5)
-        self.original_ax.set_ylim(-3, 3)
-        self.original_plot, = self.original_ax.plot([], [], color="blue")
+        self.original_renderer = BlitLinePlot(self.original_canvas, self.original_ax)
         self.graph_layout2.addWidget(self.original_canvas)
 
         # Filtered Signal Plot
         self.filtered_fig, self.filtered_ax = plt.subplots()
         self.filtered_canvas = FigureCanvas(self.filtered_fig)
-        self.filtered_ax.set_title("Filtered Signal")
-        self.filtered_ax.set_xlim(0, 5)
-        self.filtered_ax.set_ylim(-3, 3)
-        self.filtered_plot, = self.filtered_ax.plot([], [], color="green")
+        self.filtered_renderer = BlitLinePlot(self.filtered_canvas, self.filtered_ax)
         self.graph_layout2.addWidget(self.filtered_canvas)
+        self.reset_signal_plots()
+        self.instrumentation = Instrumentation(self)
 
         # Controls Section
         self.add_buttons()
@@ -325,6 +348,9 @@ class FilterDesignApp(QMainWindow):
         self.restart_button = QPushButton("Reset")
         self.checkbox = QCheckBox("Enable Mouse Movement")
         self.checkbox.stateChanged.connect(self.checkbox_toggled)  # Connect checkbox signal
+        # Offline forward-backward filtering of the loaded recording, no phase distortion
+        self.zero_phase_checkbox = QCheckBox("Zero-Phase (Offline)")
+        self.zero_phase_checkbox.stateChanged.connect(self.zero_phase_toggled)
         self.control_layout = QHBoxLayout()
         self.load_signal_button.clicked.connect(self.load_signal)
         self.toggle_button.clicked.connect(self.toggle_filtering)
@@ -333,6 +359,14 @@ class FilterDesignApp(QMainWindow):
         self.control_layout.addWidget(self.toggle_button)
         self.control_layout.addWidget(self.restart_button)
         self.control_layout.addWidget(self.checkbox)
+        self.control_layout.addWidget(self.zero_phase_checkbox)
+        # Per-stage timings of the real-time loop, off unless asked for
+        self.timings_checkbox = QCheckBox("Record Timings")
+        self.timings_checkbox.stateChanged.connect(self.timings_toggled)
+        self.timings_button = QPushButton("Timing Stats")
+        self.timings_button.clicked.connect(self.show_timing_stats)
+        self.control_layout.addWidget(self.timings_checkbox)
+        self.control_layout.addWidget(self.timings_button)
         self.controls_layout.addLayout(self.control_layout)
 
 
@@ -341,13 +375,41 @@ class FilterDesignApp(QMainWindow):
         speed_label = QLabel("Filtering Speed (Points per Second):")
         self.speed_slider = QSlider(Qt.Horizontal)
         self.speed_slider.setMinimum(1)
-        self.speed_slider.setMaximum(100)
+        self.speed_slider.setMaximum(10000)
         self.speed_slider.setValue(self.speed)
         self.speed_slider.valueChanged.connect(self.update_speed)
 
         self.controls_layout.addWidget(speed_label)
         self.controls_layout.addWidget(self.speed_slider)
 
+        # Block size: the most samples filtered in one engine call
+        block_size_label = QLabel("Block Size (Samples per Call):")
+        self.block_size_combo = QComboBox()
+        self.block_size_combo.addItems(['1', '10', '50', '100', '250', '500', '1000'])
+        self.block_size_combo.setCurrentText(str(self.block_size))
+        self.block_size_combo.currentTextChanged.connect(self.update_block_size)
+
+        self.controls_layout.addWidget(block_size_label)
+        self.controls_layout.addWidget(self.block_size_combo)
+
+        # Display decimation keeps long windows down to about one point pair per pixel
+        decimation_label = QLabel("Display Decimation:")
+        self.decimation_combo = QComboBox()
+        self.decimation_combo.addItems(["Min/Max Envelope", "LTTB", "Off"])
+        self.decimation_combo.currentTextChanged.connect(self.update_decimation)
+
+        self.controls_layout.addWidget(decimation_label)
+        self.controls_layout.addWidget(self.decimation_combo)
+
+        # Filter kernel: SciPy, a kernel from kernels.py, or the generated C compiled on first use
+        backend_label = QLabel("Filter Backend:")
+        self.backend_combo = QComboBox()
+        self.backend_combo.addItems(["SciPy", "NumPy", "Numba", "Native C"])
+        self.backend_combo.currentTextChanged.connect(self.update_backend)
+
+        self.controls_layout.addWidget(backend_label)
+        self.controls_layout.addWidget(self.backend_combo)
+
     def add_checkboxes_and_comboboxes(self):
         self.add_conjugates_checkbox = QCheckBox("Add Conjugates")
         self.add_conjugates_checkbox.stateChanged.connect(self.ensure_conjugates)
@@ -385,13 +447,7 @@ class FilterDesignApp(QMainWindow):
 
         # Expanded filter library
         self.filter_library_combobox = QComboBox()
-        self.filter_library_combobox.addItems([
-            "Butterworth LPF", "Butterworth HPF", "Butterworth BPF",
-            "Chebyshev I LPF", "Chebyshev I HPF", "Chebyshev I BPF",
-            "Chebyshev II LPF", "Chebyshev II HPF", "Chebyshev II BPF",
-            "Bessel LPF", "Bessel HPF", "Bessel BPF",
-            "Elliptic LPF", "Elliptic HPF", "Elliptic BPF"
-        ])
+        self.filter_library_combobox.addItems(PREDEFINED_FILTERS)
         self.filter_library_combobox.currentIndexChanged.connect(self.load_predefined_filter)
 
         self.controls_layout.addWidget(QLabel("Filter Library"))
@@ -565,15 +621,17 @@ class FilterDesignApp(QMainWindow):
 
         if self.selected_type == "zero":
             self.zeros[self.selected_point] = new_position
+            self.freq_response_evaluator.move_zero(self.selected_point, new_position)
         elif self.selected_type == "pole":
             self.poles[self.selected_point] = new_position
+            self.freq_response_evaluator.move_pole(self.selected_point, new_position)
         # elif self.selected_type == "all_pass_zero":
         #     self.active_all_pass_filters[self.selected_apf_idx]["zeros"][self.selected_point] = new_position
         # elif self.selected_type == "all_pass_pole":
         #     self.active_all_pass_filters[self.selected_apf_idx]["poles"][self.selected_point] = new_position
 
         self.plot_z_plane()
-        self.plot_frequency_response()
+        self.update_magnitude_response()
     
     def on_release(self, event):
         if self.selected_point is not None:
@@ -661,107 +719,34 @@ class FilterDesignApp(QMainWindow):
     def save_filter(self):
         file_name, _ = QFileDialog.getSaveFileName(self, "Save Filter", "", "CSV Files (*.csv)")
         if file_name:
-            with open(file_name, "w") as file:
-                file.write("zeros,poles\n")
-                file.write("{}\n".format(",".join(map(str, self.zeros))))
-                file.write("{}\n".format(",".join(map(str, self.poles))))
+            write_design(file_name, self.zeros, self.poles, self.gain)
 
     def load_filter(self):
         file_name, _ = QFileDialog.getOpenFileName(self, "Load Filter", "", "CSV Files (*.csv)")
         if file_name:
-            with open(file_name, "r") as file:
-                lines = file.readlines()
-                self.zeros = [complex(z) for z in lines[1].strip().split(",")]
-                self.poles = [complex(p) for p in lines[2].strip().split(",")]
+            self.zeros, self.poles, self.gain = read_design(file_name)
             self.plot_z_plane()
             self.plot_frequency_response()
 
     def generate_c_code(self):
+        form, ok = QInputDialog.getItem(self, "Generate C Code", "Filter structure:", list(C_CODE_FORMS), 0, False)
+        if not ok:
+            return
         file_name, _ = QFileDialog.getSaveFileName(self, "Generate C Code", "", "C Files (*.c)")
         if file_name:
             try:
-                # Get filter coefficients
-                b, a = zpk2tf(self.zeros, self.poles, 1)
-
-                # Generate C code
-                c_code = f"""
-    /**
-     * Auto-generated digital filter implementation
-     * Filter Type: Direct Form II
-     * Number of zeros: {len(self.zeros)}
-     * Number of poles: {len(self.poles)}
-     */
-
-    #include <stdio.h>
-    #include <string.h>
-
-    #define FILTER_ORDER {max(len(b) - 1, len(a) - 1)}
-    #define BUFFER_SIZE (FILTER_ORDER + 1)
-
-    // Filter coefficients
-    static const double b_coeffs[] = {{{', '.join(map(str, b))}}};
-    static const double a_coeffs[] = {{{', '.join(map(str, a))}}};
-
-    // State buffer for Direct Form II implementation
-    static double state[BUFFER_SIZE] = {{0.0}};
-    static int buffer_index = 0;
-
-    // Function to reset filter state
-    void reset_filter(void) {{
-        memset(state, 0, sizeof(state));
-        buffer_index = 0;
-    }}
-
-    // Process single sample through filter
-    double process_sample(double input) {{
-        double output = 0.0;
-        double new_state;
-
-        // Calculate new state
-        new_state = input;
-        for (int i = 1; i <= FILTER_ORDER; i++) {{
-            new_state -= a_coeffs[i] * state[(buffer_index - i + BUFFER_SIZE) % BUFFER_SIZE];
-        }}
-
-        // Update state buffer
-        state[buffer_index] = new_state;
-
-        // Calculate output
-        for (int i = 0; i <= FILTER_ORDER; i++) {{
-            output += b_coeffs[i] * state[(buffer_index - i + BUFFER_SIZE) % BUFFER_SIZE];
-        }}
-
-        // Update buffer index
-        buffer_index = (buffer_index + 1) % BUFFER_SIZE;
-
-        return output;
-    }}
-
-    // Example usage
-    #ifdef FILTER_TEST
-    int main() {{
-        // Test input samples
-        double test_samples[] = {{1.0, 0.0, 0.0, 0.0, 0.0}};
-        int num_samples = sizeof(test_samples) / sizeof(test_samples[0]);
-
-        printf("Testing filter implementation\\n");
-        printf("Input -> Output\\n");
-
-        for (int i = 0; i < num_samples; i++) {{
-            double output = process_sample(test_samples[i]);
-            printf("%f -> %f\\n", test_samples[i], output);
-        }}
-
-        return 0;
-    }}
-    #endif
-    """
+                c_code = C_CODE_FORMS[form](self.zeros, self.poles, self.gain)
+
                 # Write to file
                 with open(file_name, 'w') as f:
                     f.write(c_code)
 
-                # Show success message
-                QMessageBox.information(self, "Success", "C code generated successfully!")
+                # Show success message, with the quantization effects for fixed-point code
+                message = "C code generated successfully!"
+                if form in FIXED_POINT_FORMS:
+                    design = FixedPointDesign(self.zeros, self.poles, self.gain, FIXED_POINT_FORMS[form])
+                    message += "\n\n" + describe_quantization(quantization_report(design))
+                QMessageBox.information(self, "Success", message)
 
             except Exception as e:
                 QMessageBox.critical(self, "Error", f"Failed to generate C code: {str(e)}")
@@ -810,12 +795,13 @@ class FilterDesignApp(QMainWindow):
 
     def plot_frequency_response(self):
         self.freq_response_ax.clear()
+        self.magnitude_line = None
 
         if self.zeros or self.poles:
             # Calculate frequency response based on updated zeros and poles
-            b, a = zpk2tf(self.zeros, self.poles, 1)
-            w, h = freqz(b, a, worN=8000)
-            self.freq_response_ax.plot(w / np.pi, 20 * np.log10(abs(h)), color="blue", label="Magnitude Response")
+            self.freq_response_evaluator.set_design(self.zeros, self.poles)
+            w = self.freq_response_evaluator.w
+            self.magnitude_line, = self.freq_response_ax.plot(w / np.pi, self.freq_response_evaluator.magnitude_db, color="blue", label="Magnitude Response")
             self.freq_response_ax.set_title("Frequency Response")
             self.freq_response_ax.set_xlabel("Normalized Frequency (xπ rad/sample)")
             self.freq_response_ax.set_ylabel("Magnitude (dB)")
@@ -823,17 +809,37 @@ class FilterDesignApp(QMainWindow):
             self.freq_response_canvas.figure.subplots_adjust(bottom=0.18,top=0.90,left=0.1,right=0.95)
         self.freq_response_canvas.draw()
 
+    def update_magnitude_response(self):
+        """Refresh the magnitude curve in place after a single zero or pole moved."""
+        if self.magnitude_line is None or not self.freq_response_evaluator.matches(self.zeros, self.poles):
+            self.plot_frequency_response()
+            return
+        self.magnitude_line.set_ydata(self.freq_response_evaluator.magnitude_db)
+        self.freq_response_ax.relim()
+        self.freq_response_ax.autoscale_view()
+        self.freq_response_canvas.draw_idle()
+
     def plot_phase_response(self):
         # Recalculate phase response based on updated zeros and poles
         self.phase_response_ax.clear()
+        self.group_delay_ax.clear()
+        self.group_delay_ax.yaxis.tick_right()
+        self.group_delay_ax.yaxis.set_label_position("right")
         if self.zeros or self.poles:
-            w, h = freqz_zpk(self.zeros, self.poles, 1)
-            self.phase_response_ax.clear()
-            self.phase_response_ax.plot(w / np.pi, np.angle(h), label="Phase Response")
+            # Shares the evaluation with the magnitude plot; only recomputed if the design changed
+            self.freq_response_evaluator.set_design(self.zeros, self.poles)
+            w = self.freq_response_evaluator.w
+            phase_line, = self.phase_response_ax.plot(w / np.pi, self.freq_response_evaluator.phase, label="Phase Response")
+            group_delay = self.freq_response_evaluator.group_delay
+            # Roots exactly on the grid give inf or nan; leave a gap there
+            group_delay = np.where(np.isfinite(group_delay), group_delay, np.nan)
+            delay_line, = self.group_delay_ax.plot(w / np.pi, group_delay, color="orange", label="Group Delay")
             self.phase_response_ax.set_title("Phase Response")
             self.phase_response_ax.set_xlabel("Normalized Frequency")
             self.phase_response_ax.set_ylabel("Phase (radians)")
-            self.phase_response_canvas.figure.subplots_adjust(bottom=0.18,top=0.90,left=0.1,right=0.95)
+            self.group_delay_ax.set_ylabel("Group Delay (samples)")
+            self.phase_response_ax.legend(handles=[phase_line, delay_line], loc='upper right')
+            self.phase_response_canvas.figure.subplots_adjust(bottom=0.18,top=0.90,left=0.1,right=0.88)
         self.phase_response_canvas.draw()
 
     def load_predefined_filter(self, index):
@@ -842,57 +848,10 @@ class FilterDesignApp(QMainWindow):
         cutoff = self.cutoff_slider.value() / 100.0  # Normalize to [0,1]
         ripple = self.ripple_slider.value()
 
-        # For bandpass filters
-        if "BPF" in self.filter_library_combobox.currentText():
-            low_freq = cutoff * 0.8  # Lower cutoff
-            high_freq = cutoff * 1.2  # Upper cutoff
-            band = [low_freq, high_freq]
-        else:
-            band = cutoff
-
         try:
             # Initialize filter based on selection
             filter_type = self.filter_library_combobox.currentText()
-
-            if "Butterworth" in filter_type:
-                if "LPF" in filter_type:
-                    z, p, k = butter(order, band, btype='low', output='zpk')
-                elif "HPF" in filter_type:
-                    z, p, k = butter(order, band, btype='high', output='zpk')
-                else:  # BPF
-                    z, p, k = butter(order, band, btype='band', output='zpk')
-
-            elif "Chebyshev I" in filter_type:
-                if "LPF" in filter_type:
-                    z, p, k = cheby1(order, ripple, band, btype='low', output='zpk')
-                elif "HPF" in filter_type:
-                    z, p, k = cheby1(order, ripple, band, btype='high', output='zpk')
-                else:  # BPF
-                    z, p, k = cheby1(order, ripple, band, btype='band', output='zpk')
-
-            elif "Chebyshev II" in filter_type:
-                if "LPF" in filter_type:
-                    z, p, k = cheby2(order, ripple, band, btype='low', output='zpk')
-                elif "HPF" in filter_type:
-                    z, p, k = cheby2(order, ripple, band, btype='high', output='zpk')
-                else:  # BPF
-                    z, p, k = cheby2(order, ripple, band, btype='band', output='zpk')
-
-            elif "Bessel" in filter_type:
-                if "LPF" in filter_type:
-                    z, p, k = bessel(order, band, btype='low', output='zpk')
-                elif "HPF" in filter_type:
-                    z, p, k = bessel(order, band, btype='high', output='zpk')
-                else:  # BPF
-                    z, p, k = bessel(order, band, btype='band', output='zpk')
-
-            elif "Elliptic" in filter_type:
-                if "LPF" in filter_type:
-                    z, p, k = ellip(order, ripple, 40, band, btype='low', output='zpk')
-                elif "HPF" in filter_type:
-                    z, p, k = ellip(order, ripple, 40, band, btype='high', output='zpk')
-                else:  # BPF
-                    z, p, k = ellip(order, ripple, 40, band, btype='band', output='zpk')
+            z, p, k = design_predefined_filter(filter_type, order, cutoff, ripple)
 
             # Update filter
             self.zeros = list(z)
@@ -910,23 +869,54 @@ class FilterDesignApp(QMainWindow):
     def update_speed(self, value):
         self.speed = value
         if self.timer.isActive():
-            self.timer.setInterval(1000 // self.speed)
+            self.stream_clock = (time.perf_counter(), self.index)
+            self.timer.setInterval(self.tick_interval())
+
+    def update_block_size(self, text):
+        self.block_size = int(text)
+        if self.timer.isActive():
+            self.timer.setInterval(self.tick_interval())
+
+    def update_decimation(self, text):
+        mode = {"Min/Max Envelope": "minmax", "LTTB": "lttb", "Off": None}[text]
+        self.original_renderer.decimation = mode
+        self.filtered_renderer.decimation = mode
+
+    def update_backend(self, text):
+        backend = {"SciPy": "scipy", "NumPy": "numpy", "Numba": "numba", "Native C": "native"}[text]
+        self.filter_engine.set_backend(backend)
+        self.mouse_filter_engine.set_backend(backend)
+
+    def tick_interval(self):
+        """Timer interval (ms): block_size samples per tick at the requested speed, but at least one tick per frame.
+
+        process_next_point filters whatever the stream clock says is due, so a
+        shorter interval only splits the work into more ticks and never
+        changes the rate. Without the cap a large block at a low speed would
+        show nothing for block_size / speed seconds.
+        """
+        return max(1, min(int(1000 * self.block_size / self.speed), 1000 // self.display_fps))
 
     def checkbox_toggled(self, state):
         if state == 2:  # Checked
             self.enable_mouse=True
             self.restart_filtering()
+            self.display_timer.start(1000 // self.display_fps)
         else:  # Unchecked
             self.enable_mouse=False
             self.restart_filtering()
 
     def start_filtering(self):
-        if self.signal.size > 0 and self.x_values.size > 0:
+        if self.signal.size > 0 and (self.signal_file is not None or self.x_values.size > 0):
             self.compute_filter_coefficients()
-            self.timer.start(1000 // self.speed)
+            self.stream_clock = (time.perf_counter(), self.index)
+            self.timer.start(self.tick_interval())
+            self.display_timer.start(1000 // self.display_fps)
 
     def stop_filtering(self):
         self.timer.stop()
+        self.display_timer.stop()
+        self.refresh_display()
 
     def toggle_filtering(self):
         """Toggle the filtering process between start and stop."""
@@ -942,54 +932,113 @@ class FilterDesignApp(QMainWindow):
         """Restart the filtering process from the beginning."""
         self.stop_filtering()
         self.index = 0
+        self.displayed_index = 0
+        self.filter_engine.reset()
         self.filtered_signal.fill(0)  # Clear filtered signal
-        self.update_plots()  # Reset the plots
+        self.zero_phase_ready = False
+        self.reset_signal_plots()
         self.toggle_button.setText("Start")
         self.filtering_active = False
 
     def load_signal(self):
         options = QFileDialog.Options()
-        file_path, _ = QFileDialog.getOpenFileName(self, "Load Signal File", "", "CSV Files (*.csv);;All Files (*)", options=options)
+        file_path, _ = QFileDialog.getOpenFileName(self, "Load Signal File", "", "Signal Files (*.csv *.bin);;CSV Files (*.csv);;Binary Signal Files (*.bin);;All Files (*)", options=options)
         if file_path:
-            data = np.loadtxt(file_path, delimiter=",")
-            if data.shape[1] >= 2:  # Ensure file has at least two columns
-                self.x_values = data[:, 0]
-                self.signal = data[:, 1]
-                self.filtered_signal = np.zeros_like(self.signal)
-                self.index = 0
+            if file_path.endswith(".bin"):
+                # Memory-mapped: samples are read from disk as filtering reaches them, and
+                # times are only computed for what is plotted
+                self.signal_file = open_signal(file_path)
+                self.signal = self.signal_file.samples
+            else:
+                self.signal_file = None
+                self.x_values, self.signal = read_csv_signal(file_path)
+            # Zeroed lazily by the OS, so pages are only committed as filtering reaches them
+            self.filtered_signal = np.zeros(self.signal.shape)
+            self.zero_phase_ready = False
+            self.index = 0
+            self.filter_engine.reset()  # A new stream starts from its own first sample
+            self.displayed_index = 0
+            self.reset_signal_plots()
         # self.compute_filter_coefficients()
 
     def compute_filter_coefficients(self):
-        """Compute filter coefficients based on zeros, poles, and gain."""
+        """Load the current zeros, poles, and gain into the filter engines.
+
+        Cheap when nothing changed: the engines only recompute coefficients and
+        reset their state when the design differs from the one they hold.
+        """
         if self.zeros or self.poles:
-            self.filter_b, self.filter_a = signal.zpk2tf(self.zeros, self.poles, self.gain)
-            self.filter_b = np.real_if_close(self.filter_b)
-            self.filter_a = np.real_if_close(self.filter_a)
+            design = (self.zeros, self.poles, self.gain)
+        else:
+            design = ([], [], 1)  # Pass the signal through unchanged
+        self.mouse_filter_engine.set_design(*design)
+        if not self.filter_engine.set_design(*design):
+            return  # Same design as before, keep the coefficients and filter state
+        self.zero_phase_ready = False
+        if self.filter_engine.sos is not None:
+            print(f"Filter sections (sos): {self.filter_engine.sos}")
         else:
-            self.filter_b, self.filter_a = [1.0, -0.5], [1.0, -0.5]
-        self.filter_state = signal.lfilter_zi(self.filter_b, self.filter_a) * self.signal[0]
-        print(f"Filter coefficients (b): {self.filter_b}")
-        print(f"Filter coefficients (a): {self.filter_a}")
+            print(f"Filter coefficients (b): {self.filter_engine.b}")
+            print(f"Filter coefficients (a): {self.filter_engine.a}")
 
 
     def process_next_point(self):
-        """Process the next signal point and apply the filter."""
-        if self.index < len(self.signal):
-            point = self.signal[self.index]
-            filtered_point, self.filter_state = signal.lfilter(
-                self.filter_b, self.filter_a, [point], zi=self.filter_state
-            )
-            self.filtered_signal[self.index] = filtered_point[0]
-            self.index += 1
+        """Filter every point that is due at the requested speed, block_size points per engine call.
+
+        Plotting is left to refresh_display, so the processing rate is not limited by drawing.
+        """
+        started_at, start_index = self.stream_clock
+        due = start_index + int((time.perf_counter() - started_at) * self.speed)
+        due = min(due, len(self.signal))
+        if self.zero_phase_checkbox.isChecked() and self.apply_zero_phase():
+            self.index = max(self.index, due)  # Already filtered, just reveal it
+        while self.index < due:
+            end = min(self.index + self.block_size, due)
+            self.filter_engine.process(self.signal[self.index:end], out=self.filtered_signal[self.index:end])
+            self.index = end
+        if self.index >= len(self.signal):
+            self.timer.stop()
+            self.display_timer.stop()
+            self.refresh_display()
+
+    def refresh_display(self):
+        """Draw one frame with whatever was processed since the previous frame."""
+        if self.enable_mouse:
+            if self.mouse_frame_pending:
+                self.update_mouse_plot()
+                self.mouse_frame_pending = False
+        elif self.index != self.displayed_index:
             self.update_plots()
+            self.displayed_index = self.index
+
+    def apply_zero_phase(self):
+        """Zero-phase filter the whole loaded signal once per design; False if the design does not allow it."""
+        if not self.zero_phase_ready:
+            try:
+                self.filter_engine.zero_phase(self.signal, self.filtered_signal)
+            except ValueError as e:
+                self.zero_phase_checkbox.setChecked(False)
+                QMessageBox.warning(self, "Zero-Phase Filtering", str(e))
+                return False
+            self.zero_phase_ready = True
+        return True
+
+    def timings_toggled(self, state):
+        if state == 2:  # Checked
+            self.instrumentation.enable()
         else:
-            self.timer.stop()
+            self.instrumentation.disable()
+
+    def show_timing_stats(self):
+        self.stats_dialog = StatsDialog(self.instrumentation, self)
+        self.stats_dialog.show()
+
+    def zero_phase_toggled(self, state):
+        self.zero_phase_ready = False
+        self.filter_engine.reset()  # Causal filtering picks up from the current sample
 
     def apply_filter(self, point):
-        if not hasattr(self, 'filter_state'):
-            self.filter_state = signal.lfilter_zi(self.filter_b, self.filter_a) * point
-        filtered_point, self.filter_state = signal.lfilter(self.filter_b, self.filter_a, [point], zi=self.filter_state)
-        return filtered_point[0]
+        return self.filter_engine.process([point])[0]
 
 
     # def update_plots(self):
@@ -1020,38 +1069,26 @@ class FilterDesignApp(QMainWindow):
     def update_plots(self):
         """Update the original and filtered signal plots dynamically."""
         if self.index > 0:
-            self.original_ax.clear()
-            self.filtered_ax.clear()
-
-            x_data = self.x_values[:self.index] * self.x_scale_factor
-            y_data_original = self.signal[:self.index]
-            y_data_filtered = self.filtered_signal[:self.index]
-
-            # Plot original signal in blue and filtered signal in red
-            self.original_ax.plot(x_data, y_data_original, color='blue', label="Original Signal")
-            self.filtered_ax.plot(x_data, y_data_filtered, color='red', label="Filtered Signal")
-
-            # Dynamically adjust x and y limits
-            self.original_ax.set_xlim(max(0, x_data[-1] - 5), x_data[-1] + 0.2)
-            self.filtered_ax.set_xlim(max(0, x_data[-1] - 5), x_data[-1] + 0.2)
-
-            y_min_input = min(y_data_original) - 0.2
-            y_max_input = max(y_data_original) + 0.2
-            y_min_output = min( y_data_filtered) - 0.2
-            y_max_output = max( y_data_filtered) + 0.2
-
-            self.original_ax.set_ylim(y_min_input, y_max_input)
-            self.filtered_ax.set_ylim(y_min_output, y_max_output)
-
-            # Add legends to indicate which line is which
-            self.original_ax.legend(loc='upper right')
-            self.filtered_ax.legend(loc='upper right')
-
-            # Redraw the plots
-            self.original_canvas.draw()
-            self.filtered_canvas.draw()
-
-
+            start = 0
+            if self.signal_file is not None:
+                # Only the last plot window can be visible; build times for just those samples
+                window_samples = int(np.ceil(self.original_renderer.window * self.signal_file.sample_rate))
+                start = max(0, self.index - window_samples - 1)
+                x_data = self.signal_file.times(start, self.index)
+            else:
+                x_data = self.x_values[:self.index]
+            self.original_renderer.update(x_data, self.signal[start:self.index])
+            self.filtered_renderer.update(x_data, self.filtered_signal[start:self.index])
+
+    def reset_signal_plots(self):
+        """Start fresh lines on the signal plots for the loaded signal or the mouse stream."""
+        if self.enable_mouse:
+            self.original_renderer.reset("Mouse Input Signal", "red")
+            self.filtered_renderer.reset("Mouse Filtered Signal", "green")
+        else:
+            channels = 1 if self.signal.ndim == 1 else self.signal.shape[1]
+            self.original_renderer.reset("Original Signal", "blue", "Original Signal", channels)
+            self.filtered_renderer.reset("Filtered Signal", "red", "Filtered Signal", channels)
 
     def on_mouse_motion(self, event):
         """Capture mouse motion to generate a real-time signal."""
@@ -1064,45 +1101,27 @@ class FilterDesignApp(QMainWindow):
                 delta_y = event.ydata - self.prev_mouse_y
                 self.mouse_signal.append(delta_y)
                 self.mouse_time.append(current_time)
-                if len(self.mouse_signal) > 10000:
-                    self.mouse_signal.pop(0)
-                    self.mouse_time.pop(0)
-                if self.filter_state is None and len(self.filter_a) > 1:
-                    self.filter_state = signal.lfilter_zi(self.filter_b, self.filter_a) * delta_y
-                if self.filter_state is not None:
-                    self.filtered_mouse_signal.append(self.apply_filter2(delta_y))
-                else:
-                    self.filtered_mouse_signal.append(delta_y)  # Fallback in case of invalid filter
-                self.update_mouse_plot()
+                self.filtered_mouse_signal.append(self.apply_filter2(delta_y))
+                self.mouse_frame_pending = True
             self.prev_mouse_y = event.ydata
 
     def apply_filter2(self, point):
         """Apply filter on a single point in real-time."""
-
-        if self.filter_state is None and len(self.filter_a) > 1:
-            self.filter_state = signal.lfilter_zi(self.filter_b, self.filter_a) * point
-        if self.filter_state is not None:
-            filtered_point, self.filter_state = signal.lfilter(self.filter_b, self.filter_a, [point], zi=self.filter_state)
-            return filtered_point[0]
-        return point  # Return original point if filtering is not possible
+        return self.mouse_filter_engine.process([point])[0]
 
     def update_mouse_plot(self):
         """Update the mouse input signal plot dynamically."""
-        self.original_ax.clear()
-        self.original_ax.set_title("Mouse Input Signal")
-        self.original_ax.plot(self.mouse_time[-self.window_size:], self.mouse_signal[-self.window_size:], color='red')
-        self.original_canvas.draw()
-
-        self.filtered_ax.clear()
-        self.filtered_ax.set_title("Mouse Filtered Signal")
-        self.filtered_ax.plot(self.mouse_time[-self.window_size:], self.filtered_mouse_signal[-self.window_size:], color='green')
-        self.filtered_canvas.draw()
+        mouse_time = self.mouse_time.latest(self.window_size)
+        self.original_renderer.update(mouse_time, self.mouse_signal.latest(self.window_size))
+        self.filtered_renderer.update(mouse_time, self.filtered_mouse_signal.latest(self.window_size))
 
     def load_signal_from_mouse(self):
         """Set the mouse-generated signal as the input signal."""
-        self.signal = np.array(self.mouse_signal)
+        self.signal = self.mouse_signal.latest().copy()
         self.filtered_signal = np.zeros_like(self.signal)
+        self.zero_phase_ready = False
         self.index = 0
+        self.filter_engine.reset()
         self.compute_filter_coefficients()
 
 class PreviewWindow(QDialog):
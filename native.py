@@ -0,0 +1,118 @@
+"""Building generated C into shared libraries and calling them through ctypes.
+
+NativeSosKernel is the optional native backend of FilterEngine: the biquad
+cascade from codegen, compiled once per set of coefficients and cached on
+disk under CACHE_DIR by a hash of its source, so later runs and batch
+workers load it without compiling again.
+"""
+import ctypes
+import hashlib
+import os
+import shutil
+import subprocess
+import warnings
+from functools import lru_cache
+
+import numpy as np
+
+from codegen import sos_cascade_code
+
+COMPILE_FLAGS = ("-O2", "-shared", "-fPIC")
+CACHE_DIR = os.environ.get("RTDF_NATIVE_CACHE") or os.path.join(os.path.expanduser("~"), ".cache", "realtime_filter")
+
+
+def find_compiler():
+    """The C compiler to use: $CC, else cc, gcc or clang from PATH; None if there is none."""
+    return os.environ.get("CC") or shutil.which("cc") or shutil.which("gcc") or shutil.which("clang")
+
+
+def compile_shared_library(source, library_path, compiler=None):
+    """Compile C source into library_path (the source is kept next to it) and load it.
+
+    Raises RuntimeError when no compiler is found or compilation fails.
+    """
+    compiler = compiler or find_compiler()
+    if compiler is None:
+        raise RuntimeError("No C compiler found; set CC or install cc")
+    source_path = os.path.splitext(library_path)[0] + ".c"
+    with open(source_path, "w") as file:
+        file.write(source)
+    result = subprocess.run([compiler, *COMPILE_FLAGS, source_path, "-o", library_path],
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Compiling {source_path} failed:\n{result.stderr}")
+    return ctypes.CDLL(os.path.abspath(library_path))
+
+
+def block_function(library, name="filter_process_block"):
+    """The generated filter_process_block(state, input, output, n) with its argument types set."""
+    function = getattr(library, name)
+    function.argtypes = [ctypes.c_void_p, ctypes.c_void_p, ctypes.c_void_p, ctypes.c_size_t]
+    function.restype = None
+    return function
+
+
+def call_block(function, state, block, out):
+    """Run a block function on contiguous NumPy arrays; state is updated in place."""
+    function(state.ctypes.data, block.ctypes.data, out.ctypes.data, len(block))
+    return out
+
+
+def c_sample_dtype(sample_type):
+    """NumPy dtype of a generated filter_sample_t."""
+    return np.dtype({"float": np.float32, "double": np.float64,
+                     "int16_t": np.int16, "int32_t": np.int32}[sample_type])
+
+
+class NativeSosKernel:
+    """Compiled biquad cascade with the kernel interface of kernels.py.
+
+    The state has the layout of sosfilt's zi, (sections, 2) or (sections, 2,
+    channels), and is updated in place. Multi-channel blocks are run one
+    channel at a time.
+    """
+
+    def __init__(self, library, dtype):
+        self.process_block = block_function(library)
+        self.dtype = np.dtype(dtype)
+
+    def __call__(self, block, state, out):
+        if block.ndim == 1:
+            return call_block(self.process_block, state, block, out)
+        channel_out = np.empty(len(block), self.dtype)
+        for channel in range(block.shape[1]):
+            channel_state = np.ascontiguousarray(state[..., channel])
+            out[:, channel] = call_block(self.process_block, channel_state,
+                                         np.ascontiguousarray(block[:, channel]), channel_out)
+            state[..., channel] = channel_state
+        return out
+
+
+def sos_kernel(sos):
+    """NativeSosKernel for float32 or float64 sections, or None (with a warning) if it cannot be built."""
+    sample_type = "float" if sos.dtype == np.float32 else "double"
+    source = sos_cascade_code(sos, sample_type)
+    try:
+        library = _load_cached(source)
+    except (RuntimeError, OSError) as e:
+        warnings.warn(f"Native filter backend unavailable, using SciPy: {e}")
+        return None
+    return NativeSosKernel(library, c_sample_dtype(sample_type))
+
+
+@lru_cache(maxsize=32)
+def _load_cached(source):
+    """Load the library for source from CACHE_DIR, compiling it there first if needed."""
+    compiler = find_compiler()
+    if compiler is None:
+        raise RuntimeError("No C compiler found; set CC or install cc")
+    key = hashlib.sha256("\0".join((compiler, *COMPILE_FLAGS, source)).encode()).hexdigest()[:32]
+    library_path = os.path.join(CACHE_DIR, f"sos_{key}.so")
+    if not os.path.exists(library_path):
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        # Build under a private name and rename, so parallel workers never load a half-written file
+        build_path = os.path.join(CACHE_DIR, f"sos_{key}.{os.getpid()}.so")
+        compile_shared_library(source, build_path, compiler)
+        os.replace(build_path, library_path)
+        os.replace(os.path.splitext(build_path)[0] + ".c", os.path.splitext(library_path)[0] + ".c")
+    return ctypes.CDLL(os.path.abspath(library_path))
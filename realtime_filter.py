@@ -0,0 +1,271 @@
+"""Command-line batch filtering, without the GUI or a display server.
+
+    python -m realtime_filter filter --design design.csv --in input.csv --out output.bin
+    python -m realtime_filter filter --predefined "Butterworth LPF" --order 4 --cutoff 0.2 \\
+        --in input.bin --out output.csv
+    python -m realtime_filter filter --design design.csv --zero-phase --in input.bin --out output.bin
+    python -m realtime_filter batch --design design.csv --out-dir filtered/ data/*.csv
+    python -m realtime_filter compare --order 4 --cutoff 0.2 --in input.csv --out compare.bin \\
+        "Butterworth LPF" "Chebyshev I LPF" "Elliptic LPF"
+    python -m realtime_filter convert input.csv output.bin
+
+Designs come from a file written by Save Filter or from a filter library
+entry with the same order/cutoff/ripple parameters as the GUI. Signals are
+read and written as CSV or as the binary container from signal_io (chosen by
+the .bin extension) and filtered in blocks, so file size is not limited by
+memory.
+
+With --zero-phase the recording is filtered forward and backward, which
+cancels the phase response of the design. Binary input and output are
+memory-mapped, so this also works on recordings larger than memory; CSV
+input is read into memory first.
+
+The batch command fans many files out over a process pool. Each worker
+builds its FilterEngine once, so the SOS coefficients are computed once per
+worker rather than once per file.
+
+--backend picks the kernel for the section cascade (see kernels.py): numpy
+runs it as block matrix products, numba as a Numba-compiled loop, and native
+as C generated from the design, compiled once and cached on disk (see
+native.py). SciPy is used if Numba or a C compiler is not available.
+
+The compare command runs several library entries over one input through a
+FilterBank and writes their outputs as the channels of one file, in the
+order the names were given.
+"""
+import argparse
+import os
+import sys
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+
+from filter_designs import PREDEFINED_FILTERS, design_predefined_filter, read_design
+from filter_engine import BACKENDS, FilterBank, FilterEngine
+from signal_io import (SignalWriter, convert_csv, create_signal, iter_signal_blocks, open_signal,
+                       read_csv_signal, sample_rate_from_times)
+
+
+def load_design(args):
+    """(zeros, poles, gain) from the --design or --predefined options."""
+    if args.design:
+        return read_design(args.design)
+    return design_predefined_filter(args.predefined, args.order, args.cutoff, args.ripple)
+
+
+def filter_file(in_path, out_path, design, block_size=65536, dtype=np.float64, backend="scipy"):
+    """Filter a whole signal file block by block and write the result; returns the sample count."""
+    engine = FilterEngine(*design, dtype=dtype, backend=backend)
+    return _filter_with_engine(engine, in_path, out_path, block_size)
+
+
+def _filter_with_engine(engine, in_path, out_path, block_size):
+    engine.reset()
+    sample_rate = open_signal(in_path).sample_rate if in_path.endswith(".bin") else None
+    filtered = None  # Output buffer reused for every block of the same shape
+    with SignalWriter(out_path, sample_rate=sample_rate, dtype=engine.dtype) as writer:
+        for times, values in iter_signal_blocks(in_path, block_size):
+            if filtered is None or filtered.shape != values.shape:
+                filtered = np.empty(values.shape, dtype=engine.dtype)
+            writer.write(times, engine.process(values, out=filtered))
+    return writer.n_samples
+
+
+def zero_phase_file(in_path, out_path, design, block_size=65536, dtype=np.float64):
+    """Zero-phase filter a whole signal file; returns the sample count."""
+    engine = FilterEngine(*design, dtype=dtype)
+    if in_path.endswith(".bin"):
+        signal_file = open_signal(in_path)
+        samples = signal_file.samples
+        sample_rate, start_time = signal_file.sample_rate, signal_file.start_time
+        times = None  # Only built if the output is CSV
+    else:
+        times, samples = read_csv_signal(in_path)
+        sample_rate = sample_rate_from_times(times)
+        start_time = times[0] if len(times) else 0.0
+
+    if out_path.endswith(".bin"):
+        channels = 1 if samples.ndim == 1 else samples.shape[1]
+        out = create_signal(out_path, len(samples), channels, sample_rate, start_time, engine.dtype)
+        engine.zero_phase(samples, out, block_size)
+        out.flush()
+    else:
+        filtered = engine.zero_phase(samples, block_size=block_size)
+        if times is None:
+            times = signal_file.time_axis()
+        with SignalWriter(out_path) as writer:
+            writer.write(times, filtered)
+    return len(samples)
+
+
+_worker_engine = None  # Set in each batch worker process by _init_worker
+
+
+def _init_worker(design, dtype, backend):
+    global _worker_engine
+    _worker_engine = FilterEngine(*design, dtype=dtype, backend=backend)
+
+
+def _filter_in_worker(in_path, out_path, block_size):
+    return in_path, out_path, _filter_with_engine(_worker_engine, in_path, out_path, block_size)
+
+
+def batch_output_path(in_path, out_dir, extension=".bin"):
+    name = os.path.splitext(os.path.basename(in_path))[0]
+    return os.path.join(out_dir, name + extension)
+
+
+def filter_files(in_paths, out_dir, design, workers=None, max_pending=None,
+                 block_size=65536, dtype=np.float64, extension=".bin", backend="scipy"):
+    """Filter many files with one design across a process pool.
+
+    Yields (in_path, out_path, n_samples) in the order of in_paths. A new
+    file is queued whenever one finishes, keeping up to twice the worker
+    count queued or running, so a slow file holds back the yield order but
+    not the other workers. At most max_pending files (default: eight times
+    the worker count) are queued, running or finished but not yet yielded,
+    which bounds how far ahead of a slow file the pool can run, and so the
+    memory used, however long the file list is.
+    """
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = 2 * workers
+    max_pending = max(max_pending or 8 * workers, 1)
+    os.makedirs(out_dir, exist_ok=True)
+
+    in_paths = list(in_paths)
+    out_paths = [batch_output_path(in_path, out_dir, extension) for in_path in in_paths]
+    if len(set(out_paths)) < len(out_paths):
+        raise ValueError("Input files with the same name would overwrite each other's output")
+    results = {}
+    pending = set()
+    next_submit = 0
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(design, dtype, backend)) as pool:
+
+        def submit_more():
+            nonlocal next_submit
+            while (next_submit < len(in_paths) and len(pending) < max_in_flight
+                   and len(pending) + len(results) < max_pending):
+                future = pool.submit(_filter_in_worker, in_paths[next_submit], out_paths[next_submit], block_size)
+                future.index = next_submit
+                pending.add(future)
+                next_submit += 1
+
+        for next_yield in range(len(in_paths)):
+            submit_more()
+            # Collect finished files until the next one in input order is ready, refilling the pool meanwhile
+            while next_yield not in results:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    results[future.index] = future.result()
+                submit_more()
+            yield results.pop(next_yield)
+
+
+def compare_filters(in_path, out_path, designs, block_size=65536, dtype=np.float64):
+    """Filter a single-channel signal through several designs, reading the input once.
+
+    The output has one channel per design; returns the sample count.
+    """
+    bank = FilterBank(designs, dtype=dtype)
+    sample_rate = open_signal(in_path).sample_rate if in_path.endswith(".bin") else None
+    filtered = None  # (designs, samples) buffer reused for every block of the same length
+    with SignalWriter(out_path, sample_rate=sample_rate, dtype=bank.dtype) as writer:
+        for times, values in iter_signal_blocks(in_path, block_size):
+            if values.ndim != 1:
+                raise ValueError(f"{in_path} has several channels, compare needs a single-channel signal")
+            if filtered is None or filtered.shape[1] != len(values):
+                filtered = np.empty((len(bank), len(values)), dtype=bank.dtype)
+            writer.write(times, bank.process(values, out=filtered).T)
+    return writer.n_samples
+
+
+def add_library_arguments(parser):
+    parser.add_argument("--order", type=int, default=2, help="library filter order (default: 2)")
+    parser.add_argument("--cutoff", type=float, default=0.2,
+                        help="library cutoff, normalized to Nyquist (default: 0.2)")
+    parser.add_argument("--ripple", type=float, default=1, help="library ripple in dB (default: 1)")
+
+
+def add_processing_arguments(parser):
+    parser.add_argument("--block-size", type=int, default=65536, help="samples per filter call")
+    parser.add_argument("--dtype", choices=["float32", "float64"], default="float64",
+                        help="processing and output precision (default: float64)")
+
+
+def add_backend_argument(parser):
+    parser.add_argument("--backend", choices=BACKENDS, default="scipy",
+                        help="filter kernel: scipy, numpy (block matrix products), numba (needs numba) "
+                             "or native (C compiled on first use) (default: scipy)")
+
+
+def add_design_arguments(parser):
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--design", help="design file written by Save Filter")
+    source.add_argument("--predefined", choices=PREDEFINED_FILTERS, metavar="NAME",
+                        help="filter library entry, e.g. \"Butterworth LPF\"")
+    add_library_arguments(parser)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="realtime_filter", description=__doc__.split("\n")[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    filter_parser = commands.add_parser("filter", help="filter a signal file with a saved or library design")
+    add_design_arguments(filter_parser)
+    add_processing_arguments(filter_parser)
+    add_backend_argument(filter_parser)
+    filter_parser.add_argument("--in", dest="input", required=True, help="input signal, .csv or .bin")
+    filter_parser.add_argument("--out", dest="output", required=True, help="output signal, .csv or .bin")
+    filter_parser.add_argument("--zero-phase", action="store_true",
+                               help="filter forward and backward for zero phase distortion (offline only)")
+
+    batch_parser = commands.add_parser("batch", help="filter many signal files in parallel with one design")
+    add_design_arguments(batch_parser)
+    add_processing_arguments(batch_parser)
+    add_backend_argument(batch_parser)
+    batch_parser.add_argument("inputs", nargs="+", help="input signals, .csv or .bin")
+    batch_parser.add_argument("--out-dir", required=True, help="directory for the filtered files")
+    batch_parser.add_argument("--format", choices=["bin", "csv"], default="bin", help="output format (default: bin)")
+    batch_parser.add_argument("--workers", type=int, help="worker processes (default: CPU count)")
+    batch_parser.add_argument("--max-pending", type=int, help="files queued, running or waiting to be reported in order (default: 8 x workers)")
+
+    compare_parser = commands.add_parser("compare", help="run several library filters over one signal")
+    compare_parser.add_argument("names", nargs="+", choices=PREDEFINED_FILTERS, metavar="NAME",
+                                help="filter library entries, one output channel each")
+    add_library_arguments(compare_parser)
+    add_processing_arguments(compare_parser)
+    compare_parser.add_argument("--in", dest="input", required=True, help="input signal, .csv or .bin")
+    compare_parser.add_argument("--out", dest="output", required=True, help="output signal, .csv or .bin")
+
+    convert_parser = commands.add_parser("convert", help="convert a CSV signal to the binary format")
+    convert_parser.add_argument("input", help="input CSV signal")
+    convert_parser.add_argument("output", help="output .bin signal")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == "filter":
+        if args.zero_phase:
+            n_samples = zero_phase_file(args.input, args.output, load_design(args), args.block_size, args.dtype)
+        else:
+            n_samples = filter_file(args.input, args.output, load_design(args), args.block_size, args.dtype,
+                                    args.backend)
+        print(f"Filtered {n_samples} samples from {args.input} into {args.output}")
+    elif args.command == "batch":
+        results = filter_files(args.inputs, args.out_dir, load_design(args), args.workers, args.max_pending,
+                               args.block_size, args.dtype, "." + args.format, args.backend)
+        for in_path, out_path, n_samples in results:
+            print(f"Filtered {n_samples} samples from {in_path} into {out_path}")
+    elif args.command == "compare":
+        designs = [design_predefined_filter(name, args.order, args.cutoff, args.ripple) for name in args.names]
+        n_samples = compare_filters(args.input, args.output, designs, args.block_size, args.dtype)
+        print(f"Filtered {n_samples} samples from {args.input} through {len(designs)} filters into {args.output}")
+    elif args.command == "convert":
+        convert_csv(args.input, args.output)
+        print(f"Converted {args.input} to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,167 @@
+"""Blitting renderer and display decimation for the scrolling real-time signal plots."""
+import numpy as np
+
+
+def minmax_envelope(x, y, n_bins):
+    """Reduce a signal to the min and max sample of each of n_bins equal-count bins.
+
+    Peaks survive, since every bin keeps its extremes, and the two points of a
+    bin stay in time order so the envelope still plots as one line.
+    """
+    n = len(y)
+    if n <= 2 * n_bins:
+        return x, y
+    bin_size = -(-n // n_bins)  # Ceiling division
+    n_full = (n // bin_size) * bin_size
+    bins = y[:n_full].reshape(-1, bin_size)
+    offsets = np.arange(0, n_full, bin_size)
+    lo = offsets + np.argmin(bins, axis=1)
+    hi = offsets + np.argmax(bins, axis=1)
+    indices = np.column_stack((np.minimum(lo, hi), np.maximum(lo, hi))).ravel()
+    if n_full < n:  # Partial last bin
+        tail = n_full + np.array([np.argmin(y[n_full:]), np.argmax(y[n_full:])])
+        indices = np.concatenate((indices, np.sort(tail)))
+    return x[indices], y[indices]
+
+
+def lttb(x, y, n_out):
+    """Largest-Triangle-Three-Buckets downsampling to n_out points.
+
+    Keeps the first and last point and, from each bucket in between, the
+    point forming the largest triangle with the point kept in the previous
+    bucket and the average of the next bucket. Exact LTTB chooses bucket by
+    bucket; here every bucket is chosen at once, in two passes: the first
+    takes the previous bucket's average in place of its kept point, and the
+    second uses the points the first pass kept.
+    """
+    n = len(y)
+    if n <= n_out or n_out < 3:
+        return x, y
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    starts, sizes = edges[:-1] - 1, np.diff(edges)  # Buckets as offsets into the inner points x[1:-1]
+    inner_x, inner_y = x[1:-1], y[1:-1]
+    bucket_of = np.repeat(np.arange(n_out - 2), sizes)
+    mean_x = np.add.reduceat(inner_x, starts) / sizes
+    mean_y = np.add.reduceat(inner_y, starts) / sizes
+    next_x, next_y = np.append(mean_x[1:], x[-1]), np.append(mean_y[1:], y[-1])
+
+    def select(anchor_x, anchor_y):
+        anchor_x, anchor_y = anchor_x[bucket_of], anchor_y[bucket_of]
+        # Twice the triangle area for each candidate; the constant factor does not matter
+        areas = np.abs((anchor_x - next_x[bucket_of]) * (inner_y - anchor_y)
+                       - (anchor_x - inner_x) * (next_y[bucket_of] - anchor_y))
+        areas = np.nan_to_num(areas, nan=-np.inf)
+        # First position of each bucket's maximum
+        is_max = areas == np.repeat(np.maximum.reduceat(areas, starts), sizes)
+        return np.minimum.reduceat(np.where(is_max, np.arange(n - 2), n), starts) + 1
+
+    kept = select(np.append(x[0], mean_x[:-1]), np.append(y[0], mean_y[:-1]))
+    kept = select(np.append(x[0], x[kept[:-1]]), np.append(y[0], y[kept[:-1]]))
+    indices = np.concatenate(([0], kept, [n - 1]))
+    return x[indices], y[indices]
+
+
+DECIMATORS = {
+    "minmax": minmax_envelope,
+    "lttb": lambda x, y, n_pixels: lttb(x, y, 2 * n_pixels),
+}
+
+
+class BlitLinePlot:
+    """Scrolling line plot that redraws only its lines between axis changes.
+
+    The Line2D artists, one per channel, are created once per stream and fed with set_data for
+    the samples inside the visible time window. The axes background is cached
+    on every full draw and restored before each frame, so a frame costs the
+    same however far into the signal we are. A full draw only happens when
+    the view pages forward or the y-limits have to grow.
+
+    When the window holds more samples than the axes are wide in pixels, it
+    is decimated first ("minmax" or "lttb", see DECIMATORS; None draws every
+    sample), so the points handed to Agg stay bounded by the canvas width.
+    """
+
+    def __init__(self, canvas, ax, window=5.0, margin=0.2, decimation="minmax"):
+        self.canvas = canvas
+        self.ax = ax
+        self.window = window  # Seconds of signal kept in view
+        self.margin = margin  # Headroom around the signal range
+        self.decimation = decimation
+        self.lines = []
+        self.background = None
+        self.x_limits = None
+        self.y_limits = None
+        self.canvas.mpl_connect('draw_event', self.on_draw)
+
+    def reset(self, title, color, label=None, channels=1):
+        """Clear the axes and create the line artists for a new stream.
+
+        A single channel is drawn in color; several channels use the
+        default color cycle and no legend.
+        """
+        self.ax.clear()
+        self.ax.set_title(title)
+        self.ax.set_xlim(0, self.window)
+        self.ax.set_ylim(-3, 3)
+        if channels == 1:
+            self.lines = self.ax.plot([], [], color=color, label=label, animated=True)
+            if label:
+                self.ax.legend(loc='upper right')
+        else:
+            self.lines = [self.ax.plot([], [], animated=True)[0] for _ in range(channels)]
+        self.x_limits = None
+        self.y_limits = None
+        self.canvas.draw()
+
+    def on_draw(self, event):
+        """Cache the freshly drawn background and put the lines back on top."""
+        self.background = self.canvas.copy_from_bbox(self.ax.bbox)
+        for line in self.lines:
+            self.ax.draw_artist(line)
+
+    def update(self, x, y):
+        """Show the tail of a growing signal; x must be sorted, y is 1-D or (samples x channels)."""
+        if len(x) == 0 or not self.lines:
+            return
+        full_redraw = self.background is None
+
+        # Page the view forward by half a window once the signal runs off the right edge
+        x_last = x[-1]
+        if self.x_limits is None or not self.x_limits[0] <= x_last <= self.x_limits[1]:
+            left = max(x[0], x_last - self.window / 2)
+            self.x_limits = (left, left + self.window)
+            self.ax.set_xlim(*self.x_limits)
+            full_redraw = True
+
+        start = np.searchsorted(x, self.x_limits[0])
+        x_visible, y_visible = x[start:], y[start:]
+        if len(y_visible) == 0:
+            return
+
+        # Only ever grow the y-limits, with some slack so they settle quickly
+        y_min, y_max = np.min(y_visible), np.max(y_visible)
+        if self.y_limits is None or y_min < self.y_limits[0] or y_max > self.y_limits[1]:
+            if self.y_limits is not None:
+                y_min, y_max = min(y_min, self.y_limits[0]), max(y_max, self.y_limits[1])
+            pad = self.margin + 0.1 * (y_max - y_min)
+            self.y_limits = (y_min - pad, y_max + pad)
+            self.ax.set_ylim(*self.y_limits)
+            full_redraw = True
+
+        n_pixels = max(1, int(self.ax.bbox.width))
+        decimate = self.decimation is not None and len(y_visible) > 2 * n_pixels
+        channels = y_visible.reshape(len(y_visible), -1).T
+        for line, channel in zip(self.lines, channels):
+            if decimate:
+                # Bins start at the left edge, which stays put until the next page, so they do not shimmer
+                line.set_data(*DECIMATORS[self.decimation](x_visible, channel, n_pixels))
+            else:
+                line.set_data(x_visible, channel)
+
+        if full_redraw:
+            self.canvas.draw()
+        else:
+            self.canvas.restore_region(self.background)
+            for line in self.lines:
+                self.ax.draw_artist(line)
+            self.canvas.blit(self.ax.bbox)
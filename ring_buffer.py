@@ -0,0 +1,39 @@
+"""Fixed-capacity NumPy ring buffer for live input streams."""
+import numpy as np
+
+
+class RingBuffer:
+    """Circular buffer with O(1) append and bounded memory.
+
+    Every value is written twice, capacity slots apart, so the newest n values
+    always lie in one contiguous slice and latest() can return a view instead
+    of a copy. Once full, each append overwrites the oldest value.
+    """
+
+    def __init__(self, capacity, dtype=np.float64):
+        self.capacity = capacity
+        self._data = np.zeros(2 * capacity, dtype=dtype)
+        self._head = 0  # Next write position, in [0, capacity)
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def append(self, value):
+        self._data[self._head] = value
+        self._data[self._head + self.capacity] = value
+        self._head = (self._head + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+
+    def latest(self, n=None):
+        """View of the newest n values (all stored values by default), oldest first.
+
+        The view is only valid until the next append; copy it to keep it.
+        """
+        n = self._size if n is None else min(n, self._size)
+        end = self._head + self.capacity
+        return self._data[end - n:end]
+
+    def clear(self):
+        self._head = 0
+        self._size = 0
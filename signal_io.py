@@ -0,0 +1,225 @@
+"""Signal file formats: the CSV layout in data/ and a memory-mapped binary container.
+
+The binary container is a fixed 64-byte little-endian header followed by the
+raw samples, interleaved by channel:
+
+    offset  size  field
+    0       8     magic, b"RTDFSIG\\0"
+    8       2     format version (uint16)
+    10      8     sample dtype, NumPy dtype string such as "<f4" (NUL padded)
+    18      4     channel count (uint32)
+    22      8     samples per channel (uint64)
+    30      8     sample rate in Hz (float64)
+    38      8     time of the first sample in seconds (float64)
+    46      18    reserved, zero
+
+Opening a container maps the payload with np.memmap, so it opens instantly
+whatever its size and samples are only read from disk when they are used.
+
+CSV files are parsed in fixed-size chunks by iter_csv_blocks, so even
+multi-GB exports can be filtered or converted with bounded memory.
+"""
+import re
+import struct
+
+import numpy as np
+
+MAGIC = b"RTDFSIG\0"
+VERSION = 1
+HEADER_FORMAT = "<8sH8sIQdd"
+HEADER_SIZE = 64
+CSV_CHUNK_SIZE = 1 << 22  # Bytes of CSV text parsed at a time
+BLANK_LINES = re.compile(rb"\n\s*\n")  # One or more empty or whitespace-only lines
+
+
+class SignalFile:
+    """An opened binary signal container.
+
+    samples is a read-only memmap of shape (n_samples,) for one channel or
+    (n_samples, channels) otherwise.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as file:
+            header = file.read(HEADER_SIZE)
+        if len(header) < HEADER_SIZE or header[:8] != MAGIC:
+            raise ValueError(f"{path} is not a binary signal file")
+        (_, version, dtype, self.channels, self.n_samples,
+         self.sample_rate, self.start_time) = struct.unpack_from(HEADER_FORMAT, header)
+        if version != VERSION:
+            raise ValueError(f"{path} has unsupported signal format version {version}")
+        self.dtype = np.dtype(dtype.rstrip(b"\0").decode("ascii"))
+
+        shape = (self.n_samples,) if self.channels == 1 else (self.n_samples, self.channels)
+        if self.n_samples == 0:
+            self.samples = np.zeros(shape, dtype=self.dtype)
+        else:
+            self.samples = np.memmap(path, dtype=self.dtype, mode="r", offset=HEADER_SIZE, shape=shape)
+
+    def time_axis(self):
+        """Sample times in seconds, as in the time column of the CSV layout."""
+        return self.times(0, self.n_samples)
+
+    def times(self, start, stop):
+        """Times in seconds of samples start:stop, without building the whole axis."""
+        return self.start_time + np.arange(start, stop) / self.sample_rate
+
+
+def open_signal(path):
+    return SignalFile(path)
+
+
+def _pack_header(dtype, channels, n_samples, sample_rate, start_time):
+    header = struct.pack(HEADER_FORMAT, MAGIC, VERSION, dtype.str.encode("ascii"),
+                         channels, n_samples, float(sample_rate), float(start_time))
+    return header.ljust(HEADER_SIZE, b"\0")
+
+
+def write_signal(path, samples, sample_rate, start_time=0.0, dtype=None):
+    """Write samples, shape (n,) or (n, channels), to a binary signal container."""
+    samples = np.asarray(samples)
+    dtype = np.dtype(dtype or samples.dtype).newbyteorder("<")
+    channels = 1 if samples.ndim == 1 else samples.shape[1]
+    with open(path, "wb") as file:
+        file.write(_pack_header(dtype, channels, len(samples), sample_rate, start_time))
+        file.write(np.ascontiguousarray(samples, dtype=dtype).tobytes())
+
+
+def _parse_csv_rows(text, n_columns):
+    """Parse complete CSV lines in one vectorized call into an (n_rows, n_columns) array.
+
+    Blank lines are skipped, as np.loadtxt does.
+    """
+    text = BLANK_LINES.sub(b"\n", text)
+    flat = np.fromstring(text.replace(b"\n", b",").decode("ascii"), sep=",")
+    if flat.size % n_columns:
+        raise ValueError("CSV rows do not all have the same number of columns")
+    return flat.reshape(-1, n_columns)
+
+
+def iter_csv_blocks(path, chunk_size=CSV_CHUNK_SIZE):
+    """Yield (times, values) blocks from a time/value CSV, chunk_size bytes at a time.
+
+    values has shape (n,) for a single value column and (n, channels) for
+    several. Only one chunk is held in memory at a time. A non-numeric first
+    line is taken as a header and skipped.
+    """
+    with open(path, "rb") as file:
+        first_line = file.readline()
+        n_columns = first_line.count(b",") + 1
+        if n_columns < 2:
+            raise ValueError(f"{path} needs a time column and at least one value column")
+        try:
+            _parse_csv_rows(first_line.strip(), n_columns)
+            remainder = first_line
+        except ValueError:
+            remainder = b""  # Header line
+
+        while True:
+            chunk = file.read(chunk_size)
+            buffer = remainder + chunk
+            # Parse up to the last complete line and carry the rest into the next chunk
+            cut = buffer.rfind(b"\n") + 1 if chunk else len(buffer)
+            text, remainder = buffer[:cut].strip(), buffer[cut:]
+            if text:
+                rows = _parse_csv_rows(text, n_columns)
+                yield rows[:, 0], rows[:, 1] if n_columns == 2 else rows[:, 1:]
+            if not chunk:
+                return
+
+
+def read_csv_signal(path):
+    """Read the CSV layout in data/: a time column followed by one or more value columns."""
+    blocks = list(iter_csv_blocks(path))
+    if not blocks:
+        return np.zeros(0), np.zeros(0)
+    times, values = zip(*blocks)
+    return np.concatenate(times), np.concatenate(values)
+
+
+def iter_signal_blocks(path, block_size=65536):
+    """Yield (times, values) blocks of at most block_size samples from a .bin or CSV signal file."""
+    if path.endswith(".bin"):
+        signal_file = open_signal(path)
+        for start in range(0, signal_file.n_samples, block_size):
+            stop = min(start + block_size, signal_file.n_samples)
+            times = signal_file.times(start, stop)
+            yield times, signal_file.samples[start:stop]
+    else:
+        for times, values in iter_csv_blocks(path):
+            for start in range(0, len(times), block_size):
+                yield times[start:start + block_size], values[start:start + block_size]
+
+
+def create_signal(path, n_samples, channels, sample_rate, start_time=0.0, dtype=np.float32):
+    """Create a binary signal container of a known size and map its samples for writing."""
+    dtype = np.dtype(dtype).newbyteorder("<")
+    with open(path, "wb") as file:
+        file.write(_pack_header(dtype, channels, n_samples, sample_rate, start_time))
+        file.truncate(HEADER_SIZE + n_samples * channels * dtype.itemsize)
+    shape = (n_samples,) if channels == 1 else (n_samples, channels)
+    return np.memmap(path, dtype=dtype, mode="r+", offset=HEADER_SIZE, shape=shape)
+
+
+class SignalWriter:
+    """Streaming writer for a .bin container or, for any other extension, the CSV layout.
+
+    Blocks are appended as they come; the container header is written on
+    close() once the sample count is known. Without an explicit sample rate
+    the container takes it from the time spacing of the first block.
+    """
+
+    def __init__(self, path, sample_rate=None, dtype=np.float32):
+        self.path = path
+        self.binary = path.endswith(".bin")
+        self.sample_rate = sample_rate
+        self.dtype = np.dtype(dtype).newbyteorder("<")
+        self.start_time = 0.0
+        self.channels = 1
+        self.n_samples = 0
+        self.file = open(path, "wb" if self.binary else "w")
+        if self.binary:
+            self.file.write(b"\0" * HEADER_SIZE)  # Filled in by close()
+
+    def write(self, times, values):
+        if self.n_samples == 0 and len(times):
+            self.start_time = times[0]
+            self.channels = 1 if values.ndim == 1 else values.shape[1]
+            if self.sample_rate is None:
+                self.sample_rate = sample_rate_from_times(times)
+        if self.binary:
+            self.file.write(np.ascontiguousarray(values, dtype=self.dtype).tobytes())
+        else:
+            np.savetxt(self.file, np.column_stack((times, values)), delimiter=",", fmt="%.9g")
+        self.n_samples += len(times)
+
+    def close(self):
+        if self.binary:
+            self.file.seek(0)
+            self.file.write(_pack_header(self.dtype, self.channels, self.n_samples,
+                                         self.sample_rate or 1.0, self.start_time))
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def sample_rate_from_times(times):
+    """Sample rate implied by a time column, from the median sample spacing."""
+    if len(times) < 2:
+        return 1.0
+    return 1.0 / float(np.median(np.diff(times)))
+
+
+def convert_csv(csv_path, out_path, dtype=np.float32):
+    """One-time conversion of a CSV signal to the binary container, in bounded memory.
+
+    The sample rate comes from the time spacing in the first chunk.
+    """
+    with SignalWriter(out_path, dtype=dtype) as writer:
+        for times, values in iter_csv_blocks(csv_path):
+            writer.write(times, values)
@@ -0,0 +1,171 @@
+"""Compile the generated C for a design and check it against the Python filter.
+
+    python verify_codegen.py --predefined "Elliptic BPF" --order 8
+    python verify_codegen.py --design design.csv --forms "Biquad Cascade (float)"
+
+Every form from codegen.C_CODE_FORMS is compiled with the local C compiler
+into a shared library, loaded with ctypes and run on data/normal_ecg.csv
+and data/abnormal_ecg.csv, scaled to 90% of full scale so the fixed-point
+forms see the same input. For each form the harness reports the largest
+error against sosfilt in float64 (in units of full scale) and the
+throughput of the C code and of sosfilt on the recordings tiled to
+--samples. Float and double output must stay within the form's
+MAX_ERROR, and fixed-point output must match fixed_point's bit-exact model
+sample for sample. The exit status is 1 if a form fails to compile, is out
+of tolerance or is not bit-exact.
+
+Fixed-point forms have no error tolerance, since a design whose gain takes
+the input past full scale saturates them by design. The "clipped" column
+counts their output samples at full scale instead, and a nonzero count means
+their max error is mostly clipping rather than quantization.
+"""
+import argparse
+import sys
+import tempfile
+import time
+
+import numpy as np
+from scipy.signal import sosfilt, zpk2sos
+
+from codegen import C_CODE_FORMS, FIXED_POINT_FORMS
+from fixed_point import FixedPointDesign
+from native import block_function, c_sample_dtype, call_block, compile_shared_library
+from realtime_filter import add_design_arguments, load_design
+from signal_io import read_csv_signal
+
+ECG_FILES = ["data/normal_ecg.csv", "data/abnormal_ecg.csv"]
+FORM_SAMPLE_TYPES = {
+    "Biquad Cascade (float)": "float",
+    "Biquad Cascade (double)": "double",
+    "Biquad Cascade (Q15 fixed point)": "int16_t",
+    "Biquad Cascade (Q31 fixed point)": "int32_t",
+    "Direct Form II (double)": "double",
+}
+YES_NO = {None: "-", True: "yes", False: "NO"}
+# Largest error against sosfilt, in units of full scale, for the forms that cannot saturate
+MAX_ERROR = {
+    "Biquad Cascade (float)": 1e-4,
+    "Biquad Cascade (double)": 1e-6,
+    "Direct Form II (double)": 1e-6,
+}
+
+# The Direct Form II code filters one sample per call on static state; give it the block API
+DIRECT_FORM_BLOCK_SHIM = """
+#include <stddef.h>
+
+void filter_process_block(void *state, const double *input, double *output, size_t n) {
+    (void)state;
+    for (size_t i = 0; i < n; i++) {
+        output[i] = process_sample(input[i]);
+    }
+}
+"""
+
+
+class CompiledForm:
+    """One generated form compiled and loaded, filtering float64 signals in [-1, 1)."""
+
+    def __init__(self, form, design, build_dir):
+        self.form = form
+        self.dtype = c_sample_dtype(FORM_SAMPLE_TYPES[form])
+        self.fixed_point = FixedPointDesign(*design, FIXED_POINT_FORMS[form]) if form in FIXED_POINT_FORMS else None
+        self.n_sections = len(zpk2sos(*design))
+        source = C_CODE_FORMS[form](*design)
+        if form.startswith("Direct Form II"):
+            source += DIRECT_FORM_BLOCK_SHIM
+        name = "".join(c if c.isalnum() else "_" for c in form)
+        self.library = compile_shared_library(source, f"{build_dir}/{name}.so")
+        self.process_block = block_function(self.library)
+
+    def reset(self):
+        if self.form.startswith("Direct Form II"):
+            self.library.reset_filter()
+        # Two state variables per section, or x and y histories for fixed point
+        shape = (2, self.n_sections, 2) if self.fixed_point else (self.n_sections, 2)
+        self.state = np.zeros(shape, dtype=self.dtype)
+
+    def to_samples(self, signal):
+        if self.fixed_point:
+            return self.fixed_point.to_fixed(signal).astype(self.dtype)
+        return np.ascontiguousarray(signal, dtype=self.dtype)
+
+    def to_float(self, samples):
+        if self.fixed_point:
+            return self.fixed_point.to_float(samples)
+        return samples.astype(np.float64)
+
+    def filter(self, samples):
+        """Filter converted samples from zero state."""
+        self.reset()
+        return call_block(self.process_block, self.state, samples, np.empty_like(samples))
+
+
+def samples_per_second(function, n_samples, repeats=3):
+    best = min(_timed(function) for _ in range(repeats))
+    return n_samples / best
+
+
+def _timed(function):
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def verify_form(compiled, sos, recordings, timing_signal):
+    """Max error over the recordings, bit-exactness and clipped samples for fixed point, and C/Python throughput."""
+    result = {"max_error": 0.0, "bit_exact": None, "clipped": None}
+    for signal in recordings:
+        samples = compiled.to_samples(signal)
+        output = compiled.filter(samples)
+        reference = sosfilt(sos, signal)
+        result["max_error"] = max(result["max_error"], float(np.max(np.abs(compiled.to_float(output) - reference))))
+        if compiled.fixed_point:
+            matches = np.array_equal(output, compiled.fixed_point.filter(samples))
+            result["bit_exact"] = matches and result["bit_exact"] is not False
+            at_rails = (output <= compiled.fixed_point.sample_min) | (output >= compiled.fixed_point.sample_max)
+            result["clipped"] = (result["clipped"] or 0) + int(np.count_nonzero(at_rails))
+
+    samples = compiled.to_samples(timing_signal)
+    result["c_samples_per_s"] = samples_per_second(lambda: compiled.filter(samples), len(samples))
+    result["python_samples_per_s"] = samples_per_second(lambda: sosfilt(sos, timing_signal), len(timing_signal))
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    add_design_arguments(parser)
+    parser.add_argument("--forms", nargs="+", choices=list(C_CODE_FORMS), metavar="FORM", default=list(C_CODE_FORMS),
+                        help="generated forms to check (default: all)")
+    parser.add_argument("--samples", type=int, default=1 << 20, help="samples for the throughput runs")
+    args = parser.parse_args(argv)
+
+    design = load_design(args)
+    sos = zpk2sos(*design)
+    recordings = [read_csv_signal(path)[1] for path in ECG_FILES]
+    peak = max(np.max(np.abs(signal)) for signal in recordings)
+    recordings = [0.9 * signal / peak for signal in recordings]
+    timing_signal = np.resize(np.concatenate(recordings), args.samples)
+
+    failed = False
+    print(f"{'form':<34} {'max error':>10} {'accurate':>8} {'bit-exact':>9} {'clipped':>8} "
+          f"{'C samples/s':>14} {'sosfilt samples/s':>18}")
+    with tempfile.TemporaryDirectory() as build_dir:
+        for form in args.forms:
+            try:
+                compiled = CompiledForm(form, design, build_dir)
+            except (RuntimeError, ValueError) as e:
+                print(f"{form:<34} {e}")
+                failed = True
+                continue
+            result = verify_form(compiled, sos, recordings, timing_signal)
+            accurate = None if form not in MAX_ERROR else result["max_error"] <= MAX_ERROR[form]
+            failed = failed or accurate is False or result["bit_exact"] is False
+            accurate, bit_exact = (YES_NO[value] for value in (accurate, result["bit_exact"]))
+            clipped = "-" if result["clipped"] is None else f"{result['clipped']:,}"
+            print(f"{form:<34} {result['max_error']:>10.2e} {accurate:>8} {bit_exact:>9} {clipped:>8} "
+                  f"{result['c_samples_per_s']:>14,.0f} {result['python_samples_per_s']:>18,.0f}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())